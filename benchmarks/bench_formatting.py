@@ -0,0 +1,35 @@
+"""
+Compare the native duration formatter against the old per-row `map_elements`.
+
+Run with `python -m benchmarks.bench_formatting [rows]`.
+"""
+
+import sys
+import timeit
+from datetime import timedelta
+
+import polars as pl
+
+from running_dashboard.formatting import format_duration
+
+
+def main(rows: int = 100_000, repeat: int = 5) -> None:
+    df = pl.DataFrame({"secs": pl.int_range(0, rows, eager=True) % 86_400})
+
+    def with_map_elements():
+        return df.select(
+            pl.col("secs").map_elements(lambda n: str(timedelta(seconds=n)), return_dtype=pl.String)
+        )
+
+    def with_native():
+        return df.select(format_duration(pl.col("secs")))
+
+    assert with_map_elements().equals(with_native())
+
+    old = min(timeit.repeat(with_map_elements, number=1, repeat=repeat))
+    new = min(timeit.repeat(with_native, number=1, repeat=repeat))
+    print(f"rows={rows:,}  map_elements={old * 1000:.1f} ms  native={new * 1000:.1f} ms  speedup={old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
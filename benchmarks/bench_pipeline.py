@@ -0,0 +1,133 @@
+"""
+Time and memory for each dashboard pipeline stage on synthetic histories.
+
+Each stage runs in its own child process so its peak RSS can be reported
+separately from the other stages (Linux only, via /proc). Run with
+`python -m benchmarks.bench_pipeline [rows ...]` (default 1k to 1M).
+"""
+
+import gc
+import multiprocessing
+import sys
+import time
+
+import altair as alt
+import polars as pl
+
+from benchmarks.synthetic import synthetic_activities, synthetic_race_results
+from running_dashboard.activity_store import split_activities
+from running_dashboard.chart_data import MileageBinCache
+from running_dashboard.charts import mileage_bar_chart
+from running_dashboard.formatting import format_duration, format_pace
+from running_dashboard.metrics import yearly_metrics_table
+from running_dashboard.runs_pager import RunsTablePager
+from running_dashboard.transforms import transform_runs
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# Measure the full inline-JSON cost instead of stopping at Altair's 5,000 row guard.
+alt.data_transformers.disable_max_rows()
+
+STAGES = [
+    "df_runs transform",
+    "yearly_metrics",
+    "legacy runs table",
+    "paged runs table",
+    "legacy mileage chart",
+    "binned mileage chart",
+]
+
+
+def legacy_runs_table(df_runs: pl.DataFrame, year: int) -> pl.DataFrame:
+    """The whole formatted runs table of `year`, as built before `RunsTablePager`."""
+    return (
+        df_runs
+        .filter(
+            (pl.col("is_race") == False) &
+            (pl.col("date").dt.year() == year)
+        )
+        .select("date", "time_in_secs", "distance_miles", "secs_per_mile")
+        .with_columns(
+            format_duration(pl.col("time_in_secs")),
+            format_pace(pl.col("secs_per_mile"))
+        )
+        .rename({"time_in_secs": "time", "secs_per_mile": "pace"})
+    )
+
+
+def legacy_mileage_by_date(df_runs: pl.DataFrame, year: int) -> pl.DataFrame:
+    """Every run of `year` as a chart row, as plotted before `MileageBinCache`."""
+    return df_runs.filter(pl.col("date").dt.year() == year).select("date", "distance_miles")
+
+
+def pipeline_stages(df_activities: pl.DataFrame) -> dict:
+    df_runs_import, _ = split_activities(df_activities)
+    df_runs = transform_runs(df_runs_import)
+    race_results = synthetic_race_results(df_runs)
+    year = df_runs["date"].max().year
+
+    return {
+        "df_runs transform": lambda: transform_runs(df_runs_import),
+        "yearly_metrics": lambda: yearly_metrics_table(df_runs, race_results),
+        "legacy runs table": lambda: legacy_runs_table(df_runs, year=year),
+        "paged runs table": lambda: RunsTablePager(df_runs).page(1, page_size=25, sort_by="pace"),
+        "legacy mileage chart": lambda: mileage_bar_chart(legacy_mileage_by_date(df_runs, year=year)).to_dict(),
+        "binned mileage chart": lambda: mileage_bar_chart(*reversed(MileageBinCache(df_runs).for_year(year))).to_dict(),
+    }
+
+
+def _status_mb(field: str) -> float:
+    with open("/proc/self/status", "r") as _f:
+        for line in _f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def _reset_peak_rss() -> None:
+    # Writing "5" resets VmHWM (peak RSS) to the current RSS on Linux.
+    with open("/proc/self/clear_refs", "w") as _f:
+        _f.write("5")
+
+
+def _run_stage(rows: int, stage_name: str, queue) -> None:
+    try:
+        stage = pipeline_stages(synthetic_activities(rows, seed=0))[stage_name]
+        gc.collect()
+        _reset_peak_rss()
+        baseline = _status_mb("VmRSS")
+        start = time.perf_counter()
+        stage()
+        queue.put((time.perf_counter() - start, max(0.0, _status_mb("VmHWM") - baseline)))
+    except BaseException as e:
+        queue.put(e)
+        raise
+
+
+def measure(rows: int, stage_name: str) -> tuple[float, float]:
+    """
+    Return (wall seconds, peak RSS growth in MB) for one stage.
+
+    The stage runs in a fresh spawned interpreter (Polars' thread pool is not
+    fork-safe) with the peak RSS counter reset just before it starts.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_stage, args=(rows, stage_name, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'rows':>10}  {'stage':<22} {'wall ms':>10} {'peak MB':>9}")
+    for rows in sizes:
+        for name in STAGES:
+            wall, peak = measure(rows, name)
+            print(f"{rows:>10,}  {name:<22} {wall * 1000:>10.1f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
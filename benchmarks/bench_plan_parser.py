@@ -0,0 +1,93 @@
+"""
+Compare `parse_training_plan` with the original full-page parser.
+
+Uses the plan pages committed in `benchmarks/fixtures` (see
+`benchmarks.save_plan_fixtures`), including pages whose plan table is
+split over several `tbody`s.
+
+Run with `python -m benchmarks.bench_plan_parser`.
+"""
+
+import glob
+import os
+import timeit
+
+import polars as pl
+from bs4 import BeautifulSoup
+
+from running_dashboard.training_plans import parse_training_plan
+
+PLAN_FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def legacy_parse_training_plan(html: str) -> pl.DataFrame:
+    """The parser `generate_training_plan` used before the extractor existed."""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', class_ = 'tablesaw')
+
+    for data in table.find_all('tbody'):
+        rows = data.find_all('tr')
+
+    weekly_schedules = []
+
+    for row in rows:
+        week = row.find_all('td')[0].text
+        monday = row.find_all('td')[1].text
+        tuesday = row.find_all('td')[2].text
+        wednesday = row.find_all('td')[3].text
+        thursday = row.find_all('td')[4].text
+        friday = row.find_all('td')[5].text
+        saturday = row.find_all('td')[6].text
+        sunday = row.find_all('td')[7].text
+        result = {
+            "Week": week,
+            "Monday": monday,
+            "Tuesday": tuesday,
+            "Wednesday": wednesday,
+            "Thursday": thursday,
+            "Friday": friday,
+            "Saturday": saturday,
+            "Sunday": sunday
+        }
+
+        weekly_schedules.append(result)
+
+    df = pl.DataFrame(weekly_schedules)
+    df = df.with_columns(pl.col("Week").cast(pl.Int32).alias("week")).drop("Week")
+    return df.unpivot(index="week", variable_name="day_of_week", value_name="training").sort("week", maintain_order=True)
+
+
+def load_fixtures(fixtures_dir: str = PLAN_FIXTURES_DIR) -> dict[str, str]:
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        with open(path, "r") as _f:
+            fixtures[os.path.basename(path)] = _f.read()
+    if not fixtures:
+        raise FileNotFoundError(
+            f"No plan pages in {fixtures_dir}; save them with `python -m benchmarks.save_plan_fixtures`."
+        )
+    return fixtures
+
+
+def main(repeat: int = 5) -> None:
+    total_old = total_new = 0.0
+    for name, html in load_fixtures().items():
+        new_df = parse_training_plan(html)
+        weeks = new_df["week"].unique().sort().to_list()
+        assert weeks == list(range(1, len(weeks) + 1)) and new_df.height == 7 * len(weeks), name
+        # The legacy parser keeps only the last tbody, so it can only be
+        # checked against single-tbody pages.
+        if html.count("<tbody") == 1:
+            assert legacy_parse_training_plan(html).equals(new_df), name
+
+        old = min(timeit.repeat(lambda: legacy_parse_training_plan(html), number=1, repeat=repeat))
+        new = min(timeit.repeat(lambda: parse_training_plan(html), number=1, repeat=repeat))
+        total_old += old
+        total_new += new
+        print(f"{name:<55} legacy={old * 1000:7.1f} ms  extractor={new * 1000:7.1f} ms  speedup={old / new:4.1f}x")
+
+    print(f"{'total':<55} legacy={total_old * 1000:7.1f} ms  extractor={total_new * 1000:7.1f} ms  speedup={total_old / total_new:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
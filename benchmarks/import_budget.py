@@ -0,0 +1,78 @@
+"""
+Check the dashboard's startup imports against a time budget.
+
+Runs `python -X importtime` in a fresh interpreter over the modules the
+`session_configs` cell imports and exits non-zero when their cumulative
+import time exceeds the budget, so a heavy import creeping back onto the
+startup path is caught.
+
+Run with `python -m benchmarks.import_budget [budget_ms]`.
+"""
+
+import os
+import subprocess
+import sys
+
+STARTUP_MODULES = [
+    "time",
+    "datetime",
+    "polars",
+    "running_dashboard.activity_store",
+    "running_dashboard.athletes",
+    "running_dashboard.background_sync",
+    "running_dashboard.cassettes",
+    "running_dashboard.chart_data",
+    "running_dashboard.date_index",
+    "running_dashboard.instrumentation",
+    "running_dashboard.metrics",
+    "running_dashboard.pipeline",
+    "running_dashboard.plan_compliance",
+    "running_dashboard.race_history",
+    "running_dashboard.runs_pager",
+    "running_dashboard.snapshot",
+    "running_dashboard.training_load",
+    "running_dashboard.transforms",
+]
+
+# Modules that must only be imported by the cells that need them.
+DEFERRED_MODULES = ["altair", "gspread", "great_tables", "stravalib", "requests", "selenium"]
+
+DEFAULT_BUDGET_MS = 1000
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import_time(modules: list[str]) -> tuple[float, set[str]]:
+    """Return (cumulative import time in ms, every module imported)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in modules)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+
+    total_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        imported.add(name.strip())
+        # Top-level imports are the ones without indentation in the tree.
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+    return total_us / 1000, imported
+
+
+def main(budget_ms: float = DEFAULT_BUDGET_MS) -> int:
+    total_ms, imported = measure_import_time(STARTUP_MODULES)
+    leaked = sorted(m for m in DEFERRED_MODULES if m in imported)
+
+    print(f"startup imports: {total_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    if leaked:
+        print(f"deferred modules imported at startup: {', '.join(leaked)}")
+    return 0 if total_ms <= budget_ms and not leaked else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(float(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,46 @@
+"""
+Save every plan page in `hh_training_plans` as an HTML fixture.
+
+The fixtures land in `benchmarks/fixtures` and drive
+`benchmarks.bench_plan_parser`. Run with `python -m benchmarks.save_plan_fixtures`.
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from running_dashboard.training_plans import make_session
+
+from benchmarks.bench_plan_parser import PLAN_FIXTURES_DIR
+
+
+def fixture_name(url: str) -> str:
+    return url.rstrip("/").rsplit("/", 1)[-1] + ".html"
+
+
+def save_fixtures(urls, max_workers: int = 4) -> None:
+    os.makedirs(PLAN_FIXTURES_DIR, exist_ok=True)
+    session = make_session(pool_size=max_workers)
+
+    def _save(url):
+        req = session.get(url)
+        req.raise_for_status()
+        with open(os.path.join(PLAN_FIXTURES_DIR, fixture_name(url)), "w") as _f:
+            _f.write(req.text)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(_save, urls))
+
+
+def training_app_plan_urls(path: str = "race_training_app.py") -> list[str]:
+    """The plan URLs listed in the race training app's `hh_training_plans` cell."""
+    with open(path, "r") as _f:
+        source = _f.read()
+    # Commented-out plans are skipped.
+    return list(dict.fromkeys(
+        re.findall(r"""^\s*"url": '([^']+)'""", source, flags=re.MULTILINE)
+    ))
+
+
+if __name__ == "__main__":
+    save_fixtures(training_app_plan_urls())
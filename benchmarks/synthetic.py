@@ -0,0 +1,85 @@
+"""Seeded synthetic Strava activities with the same schema `strava_import` produces."""
+
+import random
+from datetime import datetime, timedelta
+
+import polars as pl
+
+from running_dashboard.activity_store import ACTIVITY_SCHEMA
+
+FIRST_ACTIVITY = datetime(2022, 1, 1, 6, 0)
+
+
+def synthetic_activities(n: int, seed: int = 0, years: int = 4, ride_share: float = 0.2) -> pl.DataFrame:
+    """
+    Parameters
+    ----------
+    n : int
+        Number of activities to generate.
+
+    seed : int
+        Seed for the generator, so every run produces identical data.
+
+    years : int
+        Span of history the activities are spread over, starting 2022-01-01.
+
+    ride_share : float
+        Fraction of activities that are rides rather than runs.
+
+    Returns
+    -------
+    polars DataFrame
+        Activities matching `ACTIVITY_SCHEMA`, sorted by `start_date`, with
+        about 2% of runs marked as races (`workout_type == 1`).
+
+    Example
+    --------
+    >>> synthetic_activities(1_000, seed=42).shape
+    (1000, 16)
+    """
+    rng = random.Random(seed)
+    span_secs = years * 365 * 24 * 60 * 60
+    offsets = sorted(rng.randrange(span_secs) for _ in range(n))
+
+    columns = {name: [] for name in ACTIVITY_SCHEMA}
+    for i, offset in enumerate(offsets):
+        is_ride = rng.random() < ride_share
+        is_race = not is_ride and rng.random() < 0.02
+        speed = rng.uniform(5.0, 9.0) if is_ride else rng.uniform(2.6, 4.6)
+        distance = rng.uniform(15_000, 80_000) if is_ride else rng.uniform(3_000, 25_000)
+        elev_low = rng.uniform(0, 300)
+        has_sensors = rng.random() < 0.9
+
+        columns["name"].append(f"{'Ride' if is_ride else 'Run'} {i}")
+        columns["distance"].append(round(distance, 1))
+        columns["elapsed_time"].append(int(distance / speed * rng.uniform(1.0, 1.1)))
+        columns["total_elevation_gain"].append(round(rng.uniform(0, distance / 50), 1))
+        columns["type"].append("Ride" if is_ride else "Run")
+        columns["workout_type"].append(1 if is_race else (None if is_ride else 0))
+        columns["id"].append(10_000_000_000 + i)
+        columns["start_date"].append(FIRST_ACTIVITY + timedelta(seconds=offset))
+        columns["gear_id"].append(f"g{rng.randrange(5)}")
+        columns["average_speed"].append(round(speed, 3))
+        columns["average_cadence"].append(round(rng.uniform(80, 92), 1) if has_sensors else None)
+        columns["average_heartrate"].append(round(rng.uniform(130, 170), 1) if has_sensors else None)
+        columns["max_heartrate"].append(round(rng.uniform(170, 195), 1) if has_sensors else None)
+        columns["elev_high"].append(round(elev_low + rng.uniform(0, 100), 1))
+        columns["elev_low"].append(round(elev_low, 1))
+        columns["external_id"].append(f"garmin_ping_{i}" if has_sensors else f"{i}.gpx")
+
+    return pl.DataFrame(columns, schema=ACTIVITY_SCHEMA)
+
+
+def synthetic_race_results(df_runs: pl.DataFrame) -> pl.DataFrame:
+    """A race history sheet consistent with the races in a transformed `df_runs`."""
+    return (
+        df_runs
+        .filter(pl.col("is_race"))
+        .select(
+            "date",
+            pl.col("distance_miles").alias("miles"),
+            pl.col("time_in_secs").cast(pl.Int32).alias("official_time_in_seconds"),
+            pl.col("secs_per_mile").round(0).cast(pl.Int32).alias("official_pace_in_seconds"),
+        )
+        .with_columns(pl.col("official_time_in_seconds").cast(pl.String).alias("official_time"))
+    )
@@ -6,7 +6,6 @@
 #     "marimo",
 #     "polars==1.26.0",
 #     "requests==2.32.3",
-#     "selenium==4.30.0",
 # ]
 # ///
 
@@ -58,6 +57,26 @@ def _(df):
     return
 
 
+@app.cell
+def ui_track_plan(load_athletes, mo):
+    input_athlete = mo.ui.dropdown(
+        options={_athlete.name: _athlete.athlete_id for _athlete in load_athletes()},
+        value=load_athletes()[0].name,
+        label="Track this plan for")
+    track_plan_button = mo.ui.run_button(label="Track on the running dashboard")
+    mo.hstack([input_athlete, track_plan_button], justify="start")
+    return input_athlete, track_plan_button
+
+
+@app.cell
+def _(df, input_athlete, mo, save_active_plan, track_plan_button):
+    mo.stop(not track_plan_button.value)
+    # The dashboard compares this plan with the athlete's runs week by week.
+    save_active_plan(df, input_athlete.value)
+    mo.md(f"The running dashboard now tracks this plan for {input_athlete.selected_key}.")
+    return
+
+
 @app.cell
 def ui_dropdown_race_distance(hh_training_plans, mo):
     input_race_distance = mo.ui.dropdown(
@@ -103,18 +122,37 @@ def modules_import():
     from datetime import datetime, timedelta
     import marimo as mo
     import polars as pl
-    import requests
-    from bs4 import BeautifulSoup
-    from selenium import webdriver
-    return BeautifulSoup, datetime, mo, pl, requests, timedelta, webdriver
+    from running_dashboard.athletes import load_athletes
+    from running_dashboard.plan_compliance import save_active_plan
+    from running_dashboard.training_plans import (
+        DEFAULT_USER_AGENT,
+        TrainingPlanStore,
+        generate_training_plans,
+        make_session,
+        plan_urls,
+    )
+    import threading
+    return (
+        DEFAULT_USER_AGENT,
+        TrainingPlanStore,
+        datetime,
+        generate_training_plans,
+        load_athletes,
+        make_session,
+        mo,
+        pl,
+        plan_urls,
+        save_active_plan,
+        threading,
+        timedelta,
+    )
 
 
 @app.cell(hide_code=True)
-def extract_browser_info(webdriver):
-    driver = webdriver.Safari()
-    user_agent = driver.execute_script("return navigator.userAgent;")
-    driver.quit()
-    return driver, user_agent
+def browser_info(DEFAULT_USER_AGENT):
+    # Override with the TRAINING_PLAN_USER_AGENT environment variable.
+    user_agent = DEFAULT_USER_AGENT
+    return (user_agent,)
 
 
 @app.cell(hide_code=True)
@@ -264,68 +302,42 @@ def training_plans_dictionary():
 
 
 @app.cell
-def functions(
-    BeautifulSoup,
+def training_plan_store(
+    TrainingPlanStore,
     hh_training_plans,
-    pl,
-    requests,
-    timedelta,
+    make_session,
+    plan_urls,
+    threading,
     user_agent,
 ):
-    def generate_training_plan(distance, level, race_date, on_sunday=True):
-        url = hh_training_plans[distance][level]["url"]
-        weeks = hh_training_plans[distance][level]["no_of_weeks"]
-        headers = {"User-Agent": user_agent}
-        req = requests.get(url=url, headers=headers)
-        soup = BeautifulSoup(req.text, 'html.parser')
-        table = soup.find('table', class_ = 'tablesaw')
-
-        for data in table.find_all('tbody'):
-            rows = data.find_all('tr')
-
-        weekly_schedules = []
-
-        for row in rows:
-            week = row.find_all('td')[0].text
-            monday = row.find_all('td')[1].text
-            tuesday = row.find_all('td')[2].text
-            wednesday = row.find_all('td')[3].text
-            thursday = row.find_all('td')[4].text
-            friday = row.find_all('td')[5].text
-            saturday = row.find_all('td')[6].text
-            sunday = row.find_all('td')[7].text
-            result = {
-                "Week": week,
-                "Monday": monday,
-                "Tuesday": tuesday,
-                "Wednesday": wednesday,
-                "Thursday": thursday,
-                "Friday": friday,
-                "Saturday": saturday,
-                "Sunday": sunday
-            }
-
-            weekly_schedules.append(result)
-
-        df = pl.DataFrame(weekly_schedules)
-        df = df.with_columns(pl.col("Week").cast(pl.Int32).alias("week")).drop("Week")
-        df = df.unpivot(index="week", variable_name="day_of_week", value_name="training").sort("week")
-
-        end_date = race_date
-        start_date = end_date - (timedelta(weeks=weeks) - timedelta(days=1))
+    PREFETCH_WORKERS = 4
 
-        delta = end_date - start_date
-
-        training_dates = []
+    plan_store = TrainingPlanStore(
+        user_agent=user_agent,
+        session=make_session(user_agent, pool_size=PREFETCH_WORKERS)
+    )
 
-        for i in range(delta.days + 1):
-            day = start_date + timedelta(days=i)
-            training_dates.append(day)
+    # Warm every plan in the background so changing dropdowns never waits on the network.
+    threading.Thread(
+        target=plan_store.prefetch,
+        args=(plan_urls(hh_training_plans),),
+        kwargs={"max_workers": PREFETCH_WORKERS},
+        daemon=True
+    ).start()
+    return PREFETCH_WORKERS, plan_store
 
-        dates_df = pl.Series(name="date", values=training_dates).to_frame().with_columns(pl.col("date").dt.date())
-        final_df = pl.concat([dates_df, df], how="horizontal")
 
-        return final_df
+@app.cell
+def functions(generate_training_plans, hh_training_plans, pl, plan_store):
+    def generate_training_plan(distance, level, race_date, on_sunday=True):
+        plan_request = pl.DataFrame(
+            {"distance": [distance], "level": [level], "race_date": [race_date]},
+            schema={"distance": pl.String, "level": pl.String, "race_date": pl.Date}
+        )
+
+        return generate_training_plans(plan_request, hh_training_plans, plan_store).select(
+            "date", "week", "day_of_week", "training"
+        )
 
     def fetch_training_levels(distance):
         return hh_training_plans[distance].keys()
@@ -6,243 +6,252 @@ app = marimo.App(width="medium", app_title="The Mustachioed Runner")
 
 @app.cell
 def session_configs():
-    import altair as alt
-    import gspread
-    import json
+    # Only light imports live here. Heavy dependencies (stravalib, gspread,
+    # altair, requests) are imported by the cells that use them.
     import marimo as mo
     import polars as pl
-    import polars.selectors as cs
     import time
     from datetime import datetime, timedelta, date
-    from great_tables import GT
-    from stravalib import Client
+    from running_dashboard.activity_store import split_activities
+    from running_dashboard.athletes import load_athletes
+    from running_dashboard.background_sync import BackgroundSync, SyncResult
+    from running_dashboard.chart_data import MileageBinCache
+    from running_dashboard.date_index import DateIndex
+    from running_dashboard.instrumentation import metrics
+    from running_dashboard.metrics import format_yearly_metrics, range_metrics, yearly_metrics_table
+    from running_dashboard.pipeline import (
+        replay_dashboard_frames,
+        sheets_client_factory,
+        stored_dashboard_frames,
+        strava_clients,
+        sync_dashboard_frames,
+    )
+    from running_dashboard.plan_compliance import read_active_plan, weekly_compliance
+    from running_dashboard.runs_pager import PAGE_SIZES, SORT_COLUMNS, page_count
+    from running_dashboard.snapshot import read_snapshot
+    from running_dashboard.training_load import TrainingLoad
+    from running_dashboard.transforms import transform_runs
     return (
-        Client,
-        GT,
-        alt,
-        cs,
+        BackgroundSync,
+        DateIndex,
+        MileageBinCache,
+        PAGE_SIZES,
+        SORT_COLUMNS,
+        SyncResult,
+        TrainingLoad,
         date,
         datetime,
-        gspread,
-        json,
+        format_yearly_metrics,
+        load_athletes,
+        metrics,
         mo,
+        page_count,
         pl,
+        range_metrics,
+        read_active_plan,
+        read_snapshot,
+        replay_dashboard_frames,
+        sheets_client_factory,
+        split_activities,
+        stored_dashboard_frames,
+        strava_clients,
+        sync_dashboard_frames,
         time,
         timedelta,
+        transform_runs,
+        weekly_compliance,
+        yearly_metrics_table,
     )
 
 
 @app.cell
-def strava_api_client(Client, json, time):
-    client = Client()
+def dashboard_mode(mo, read_snapshot):
+    # `marimo run running-dashboard.py -- --snapshot data/snapshots` opens the latest
+    # snapshot from `python -m running_dashboard snapshot` read-only, with no Strava
+    # or Google Sheets calls.
+    DASHBOARD_SNAPSHOT_PATH = mo.cli_args().get("snapshot")
+    dashboard_snapshot = read_snapshot(DASHBOARD_SNAPSHOT_PATH) if DASHBOARD_SNAPSHOT_PATH else None
+
+    # `-- --cassettes record` saves the Strava and Google Sheets responses to
+    # data/cassettes; `-- --cassettes replay` serves them back with no network.
+    DASHBOARD_CASSETTE_MODE = mo.cli_args().get("cassettes")
+    return DASHBOARD_CASSETTE_MODE, DASHBOARD_SNAPSHOT_PATH, dashboard_snapshot
 
-    client_id, client_secret = open("strava_client.txt").read().split(',')
 
-    with open("strava_token.json", "r") as _f:
-        strava_token = json.load(_f)
+@app.cell
+def athletes_config(load_athletes):
+    # Without an athletes.json this is the single athlete in strava_token.json.
+    athletes = load_athletes("athletes.json")
+    return (athletes,)
+
+
+@app.cell
+def strava_api_client(
+    DASHBOARD_CASSETTE_MODE,
+    athletes,
+    dashboard_snapshot,
+    metrics,
+    strava_clients,
+    time,
+):
+    if dashboard_snapshot is None and DASHBOARD_CASSETTE_MODE == "replay":
+        clients = strava_clients(athletes, cassette_mode="replay")
+    elif dashboard_snapshot is None:
+        with metrics.stage("strava_api_client"):
+            clients = strava_clients(
+                athletes,
+                client_path="strava_client.txt",
+                background_refresh=True,
+                cassette_mode=DASHBOARD_CASSETTE_MODE
+            )
 
-    if time.time() > strava_token["expires_at"]:
         print("")
         print("****User can ignore the ERROR and WARNING messages above.****")
         print("")
-        print("Token has expired. Will refresh.")
+        for _athlete in athletes:
+            print("{} token valid. Expires at {}.".format(_athlete.name, time.strftime("%a, %d %b %Y %H:%M:%S %Z", time.localtime(clients[_athlete.athlete_id].token_expires_at))))
         print("")
-        refresh_response = client.refresh_access_token(
-            client_id=client_id,
-            client_secret=client_secret,
-            refresh_token=strava_token["refresh_token"])
-        client.access_token = refresh_response["access_token"]
-        client.refresh_token = refresh_response["refresh_token"]
-        client.token_expires_at = refresh_response["expires_at"]
     else:
-        print("")
-        print("****User can ignore the ERROR and WARNING messages above.****")
-        print("")
-        print("Token still valid. Expires at {}.".format(time.strftime("%a, %d %b %Y %H:%M:%S %Z", time.localtime(strava_token["expires_at"]))))
-        print("")
-        client.access_token = strava_token["access_token"]
-        client.refresh_token = strava_token["refresh_token"]
-        client.token_expires_at = strava_token["expires_at"]
-    return client, client_id, client_secret, refresh_response, strava_token
-
-
-@app.cell
-def functions(official_race_results_df, pl, timedelta):
-    def get_total_miles(df: pl.DataFrame ,year: int) -> dict:
-        _output = (
-            df
-            .filter(pl.col("date").dt.year() == year)
-            .with_columns(pl.col("date").dt.year().alias("year"))
-            .select("year", "distance_miles")
-            .group_by("year")
-            .sum()
-            .drop("year")
-            .to_dict(as_series=False)
-        )
-        _output_dict = {year: _output}
-        return _output
-
-    def get_avg_run_pace(df: pl.DataFrame, year: [int, float]) -> dict:
-        _output = (
-            df
-            .filter(pl.col("date").dt.year() == year)
-            .select("secs_per_mile")
-            .mean()
-            .with_columns(pl.col("secs_per_mile").round(0))
-            .with_columns(
-                pl.col("secs_per_mile")
-                .map_elements(lambda n: str(timedelta(seconds=n)), return_dtype=pl.String)
-                .alias("avg_run_pace_mins_per_mile"))
-            .drop("secs_per_mile")
-            .to_dict(as_series=False)
-        )
-        _output_dict = {year: _output}
-        return _output
-
-    def get_no_of_races(df: pl.DataFrame,  year: int) -> dict:
-        _output = (
-            df
-            .filter(
-                (pl.col("date").dt.year() == year) & 
-                (pl.col("official_time").is_not_null())
-            )
-            .select(pl.len().alias("no_of_races"))
-            .to_dict(as_series=False)
-        )
-        _output_dict = {year: _output}
-        return _output
-
-    def get_race_miles(df: pl.DataFrame, year: int) -> dict:
-        _output = (
-            df
-            .filter(
-                (pl.col("date").dt.year() == year) & 
-                (pl.col("official_time").is_not_null())
-            )
-            .select(pl.col("miles").alias("race_miles"))
-            .sum()
-            .to_dict(as_series=False)
-        )
-        _output_dict = {year: _output}
-        return _output
-
-    def get_avg_race_pace(df: pl.DataFrame, year: int) -> dict:
-        """
-        Parameters
-        ----------
-        df : polars DataFrame
-            A polars DataFrame containing both a "date" and "official_pace" column.
-
-        year: int
-            An integer value of the year
-
-        Returns
-        -------
-        dict
-            A dictionary with a list value.
-
-        Notes
-        -----
-        Rename your columns to be "date" and "official_pace" if they aren't already named that.
-
-        Example
-        --------
-        >>> get_avg_race_pace(df=official_race_results_df, year=2024)
-        {
-            "official_pace": [
-                0: 00:08:09.733333
-            ]
-        }
-        """
-        _output = (
-            official_race_results_df
-            .filter(
-                (pl.col("date").dt.year() == year) & 
-                (pl.col("official_time_in_seconds").is_not_null())
-            )
-            .select("official_pace_in_seconds")
-            .mean()
-            .with_columns(pl.col("official_pace_in_seconds").round(0))
-            .with_columns(
-                pl.col("official_pace_in_seconds")
-                .map_elements(lambda n: str(timedelta(seconds=n)), return_dtype=pl.String)
-                .alias("avg_race_pace_mins_per_mile"))
-            .drop("official_pace_in_seconds")
-            .to_dict(as_series=False)
-        )
-        _output_dict = {year: _output}
-        return _output
-    return (
-        get_avg_race_pace,
-        get_avg_run_pace,
-        get_no_of_races,
-        get_race_miles,
-        get_total_miles,
-    )
+        clients = None
+    return (clients,)
 
 
 @app.cell
-def _(mo):
+def _(dashboard_snapshot, mo):
     mo.vstack([
         mo.md("# **The Mustachioed Runner**"),
+        mo.md(f"*Read-only snapshot from {dashboard_snapshot.created_at}*") if dashboard_snapshot is not None else mo.md(""),
         mo.md("***")
     ])
     return
 
 
 @app.cell
-def _(mo, yearly_metrics):
+def sync_controls(mo, sync_worker):
+    # Polls the background sync; new frames are picked up on the next tick.
+    sync_refresh = mo.ui.refresh(options=["10s", "30s", "1m", "5m"], default_interval="30s", label="Check for new data")
+    sync_now_button = mo.ui.button(
+        label="Sync now",
+        on_click=lambda _: sync_worker.sync_now() if sync_worker is not None else None
+    )
+    return sync_now_button, sync_refresh
+
+
+@app.cell
+def _(get_synced_frames, mo, set_synced_frames, sync_refresh, sync_worker):
+    # Publishes the worker's latest frames, but only when they are new, so an
+    # idle tick doesn't re-run the whole dashboard.
+    _tick = sync_refresh.value
+    if sync_worker is not None and sync_worker.latest is not get_synced_frames():
+        set_synced_frames(sync_worker.latest)
+    return
+
+
+@app.cell
+def sync_status(datetime, get_synced_frames, mo, sync_now_button, sync_refresh, sync_worker):
+    _tick = sync_refresh.value
+    _synced = get_synced_frames()
+    if sync_worker is None:
+        _status = None
+    else:
+        _state = sync_worker.status()
+        if _state["checked_at"] is None:
+            _status = "Showing stored data, not yet synced"
+        else:
+            _minutes_ago = int((datetime.now() - _state["checked_at"]).total_seconds() // 60)
+            _status = f"Last synced {_state['checked_at']:%H:%M} ({_minutes_ago} min ago)"
+            if _synced is not None and _synced.synced_at is not None:
+                _status += f", last change at {_synced.synced_at:%H:%M}"
+        if _state["syncing"]:
+            _status += " · syncing…"
+        if _state["last_error"] is not None:
+            _status += f" · last sync failed: {_state['last_error']}"
+
+    mo.hstack([mo.md(f"*{_status}*"), sync_refresh, sync_now_button], justify="start") if _status is not None else None
+    return
+
+
+@app.cell
+def _(athletes, mo, yearly_metrics):
+    select_athlete = mo.ui.dropdown(
+        options={_athlete.name: _athlete.athlete_id for _athlete in athletes},
+        value=athletes[0].name,
+        label="Select an Athlete",
+        full_width=True
+    )
+
     select_year = mo.ui.dropdown(
-        options=yearly_metrics.keys(),
-        value=max(yearly_metrics.keys()),
+        options=yearly_metrics["year"].unique().sort().to_list(),
+        value=yearly_metrics["year"].max(),
         label="Select a Year",
         full_width=True
     )
 
     mo.hstack(
         [
+            select_athlete,
             select_year
         ]
     )
-    return (select_year,)
+    return select_athlete, select_year
 
 
 @app.cell
-def yearly_metrics_display(mo, select_year, yearly_metrics):
-    total_miles_value = "{:,.2f}".format(yearly_metrics[select_year.value]["distance_miles"][0])
-    avg_run_pace_value = yearly_metrics[select_year.value]["avg_run_pace_mins_per_mile"][0]
-    no_of_races_ran_value = yearly_metrics[select_year.value]["no_of_races"][0]
-    no_of_race_miles_ran_value = "{:,.2f}".format(yearly_metrics[select_year.value]["race_miles"][0])
-    avg_race_pace_value = yearly_metrics[select_year.value]["avg_race_pace_mins_per_mile"][0]
+def year_view_cache(dashboard_snapshot, df_runs, mileage_cache, mo, yearly_metrics):
+    from running_dashboard.charts import enable_compact_transport, mileage_bar_chart
+    from running_dashboard.year_views import YearViewCache
+
+    enable_compact_transport()
+
+    # Rebuilt, and so invalidated, whenever the runs or metrics change. Until
+    # then every (athlete, year) view, chart HTML included, is built only once.
+    year_views = YearViewCache(
+        df_runs,
+        yearly_metrics,
+        render_chart=lambda _mileage, _bin_size: mo.as_html(mileage_bar_chart(_mileage, bin_size=_bin_size)),
+        mileage_cache=mileage_cache,
+        snapshot=dashboard_snapshot,
+    )
+    return YearViewCache, enable_compact_transport, mileage_bar_chart, year_views
+
+
+@app.cell
+def _(metrics, select_athlete, select_year, year_views):
+    with metrics.stage("year_view"):
+        year_view = year_views.get(select_year.value, athlete_id=select_athlete.value)
+    return (year_view,)
+
 
+@app.cell
+def yearly_metrics_display(mo, year_view):
     total_miles_stat = mo.stat(
         label="Total Miles",
         bordered=True,
-        value=f"{total_miles_value} miles"
+        value=year_view.stats["total_miles"]
     )
 
     avg_run_pace_stat = mo.stat(
         label="Average Run Pace",
         bordered=True,
-        value=f"{avg_run_pace_value}/mile"
+        value=year_view.stats["avg_run_pace"]
     )
 
     no_of_races_ran_stat = mo.stat(
         label="No. of Races Ran",
         bordered=True,
-        value=f"{no_of_races_ran_value} races"
+        value=year_view.stats["no_of_races"]
     )
 
     no_of_race_miles_ran_stat = mo.stat(
         label="No. of Race Miles Ran",
         bordered=True,
-        value=f"{no_of_race_miles_ran_value} miles"
+        value=year_view.stats["race_miles"]
     )
 
     avg_race_pace_stat = mo.stat(
         label="Average Race Pace",
         bordered=True,
-        value=f"{avg_race_pace_value}/mile"
+        value=year_view.stats["avg_race_pace"]
     )
     mo.hstack(
         [
@@ -257,46 +266,80 @@ def yearly_metrics_display(mo, select_year, yearly_metrics):
     )
     return (
         avg_race_pace_stat,
-        avg_race_pace_value,
         avg_run_pace_stat,
-        avg_run_pace_value,
         no_of_race_miles_ran_stat,
-        no_of_race_miles_ran_value,
         no_of_races_ran_stat,
-        no_of_races_ran_value,
         total_miles_stat,
-        total_miles_value,
     )
 
 
 @app.cell
-def _(alt, df_runs, mo, pl, select_year, timedelta):
-    _df = (
-        df_runs
-        .filter(
-            (pl.col("is_race") == False) & 
-            (pl.col("date").dt.year() == select_year.value)
-        )
-        .select("date", "time_in_secs", "distance_miles", "secs_per_mile")
-        .with_columns(pl.col("time_in_secs", "secs_per_mile").round(0))
-        .with_columns(
-            pl.col("time_in_secs", "secs_per_mile")
-            .map_elements(lambda n: str(timedelta(seconds=n)), return_dtype=pl.String)
-        )
-        .rename({"time_in_secs": "time", "secs_per_mile": "pace"})
+def runs_table_controls(PAGE_SIZES, SORT_COLUMNS, mo):
+    runs_sort_by = mo.ui.dropdown(options=list(SORT_COLUMNS), value="date", label="Sort by")
+    runs_descending = mo.ui.switch(value=True, label="Descending")
+    runs_min_miles = mo.ui.number(start=0, stop=100, step=0.5, value=0, label="Min. miles")
+    runs_max_miles = mo.ui.number(start=0, stop=100, step=0.5, value=0, label="Max. miles (0 = any)")
+    runs_page_size = mo.ui.dropdown(options=[str(_size) for _size in PAGE_SIZES], value="25", label="Rows")
+    return (
+        runs_descending,
+        runs_max_miles,
+        runs_min_miles,
+        runs_page_size,
+        runs_sort_by,
     )
 
-    _input = df_runs.filter(pl.col("date").dt.year() == select_year.value).select("date", "distance_miles")
 
-    _bar_chart = alt.Chart(data=_input).mark_bar().encode(
-        x=alt.X('date', title="", scale=alt.Scale(nice={'interval': 'day', 'step': 7})),
-        y=alt.Y('distance_miles', title="No. of Miles")
+@app.cell
+def runs_table_query(
+    mo,
+    page_count,
+    runs_descending,
+    runs_max_miles,
+    runs_min_miles,
+    runs_page_size,
+    runs_sort_by,
+    year_view,
+):
+    # Recreated, and so reset to page 1, whenever the filter, sort or year changes.
+    runs_query = {
+        "sort_by": runs_sort_by.value,
+        "descending": runs_descending.value,
+        "min_miles": runs_min_miles.value,
+        "max_miles": runs_max_miles.value,
+    }
+    runs_total = len(year_view.runs_pager.query(**runs_query))
+    runs_page = mo.ui.number(
+        start=1,
+        stop=page_count(runs_total, int(runs_page_size.value)),
+        value=1,
+        label=f"Page (of {page_count(runs_total, int(runs_page_size.value))})"
     )
+    return runs_page, runs_query, runs_total
+
+
+@app.cell
+def _(
+    mo,
+    runs_descending,
+    runs_max_miles,
+    runs_min_miles,
+    runs_page,
+    runs_page_size,
+    runs_query,
+    runs_sort_by,
+    runs_total,
+    year_view,
+):
+    _rows, _ = year_view.runs_pager.page(runs_page.value, page_size=int(runs_page_size.value), **runs_query)
 
     mo.hstack(
         [
-            _df,
-            _bar_chart
+            mo.vstack([
+                mo.hstack([runs_sort_by, runs_descending, runs_min_miles, runs_max_miles], justify="start"),
+                mo.ui.table(_rows, pagination=False, selection=None),
+                mo.hstack([runs_page, runs_page_size, mo.md(f"{runs_total:,} runs")], justify="start"),
+            ]),
+            year_view.chart
         ],
         widths="equal",
         gap=1
@@ -305,89 +348,363 @@ def _(alt, df_runs, mo, pl, select_year, timedelta):
 
 
 @app.cell
-def _(df_runs_import, pl):
-    df_runs = (
-        df_runs_import
-        .with_columns(
-            (pl.col("distance") * 0.000621371).round(2).alias("distance_miles"), # meters to miles
-            pl.col("elapsed_time").alias("time_in_secs"),
-            (pl.col("total_elevation_gain") * 3.28084).round(2).alias("total_elev_gain_ft"), # meters to feet
-            (pl.col("elev_high") * 3.28084).round(2).alias("elev_high_ft"), # meters to feet
-            (pl.col("elev_low") * 3.28084).round(2).alias("elev_low_ft"), # meters to feet
-            ((26.8224/pl.col("average_speed")) * 60).alias("secs_per_mile"),
-            pl.when(pl.col("external_id").str.contains("garmin"))
-                .then(pl.lit("Recorded w/ Garmin GPS"))
-                .otherwise(pl.lit("Not Recorded w/Garmin GPS"))
-                .alias("tracking_method"),
-            pl.col("start_date").cast(pl.Date).alias("date"),
-            pl.when(pl.col("workout_type") == 1).then(True).otherwise(False).alias("is_race"),
-            pl.when(pl.col("workout_type") == 1).then(pl.col("name")).otherwise(None)
-        )
-        .select(
-            "id",
-            "name",
-            "is_race",
-            "date",
-            "time_in_secs",
-            "distance_miles",
-            "secs_per_mile",
-            "total_elev_gain_ft",
-            "elev_low_ft",
-            "elev_high_ft",
-            "average_cadence",
-            "average_heartrate",
-            "max_heartrate",
-            "workout_type",
-            "gear_id",
-            "tracking_method"
-        )
+def training_load_display(date, mo, pl, select_athlete, select_year, training_load):
+    from running_dashboard.charts import training_load_chart
+
+    _series = training_load.get(select_athlete.value)
+    _year_load = None if _series is None else _series.filter(
+        pl.col("date").is_between(date(select_year.value, 1, 1), min(date.today(), date(select_year.value, 12, 31)))
     )
-    return (df_runs,)
+    if _year_load is None or _year_load.is_empty():
+        _output = mo.md(f"No runs in {select_year.value} to compute training load from.")
+    else:
+        _latest = _year_load.row(-1, named=True)
+        _ramp_rate = "-" if _latest["ramp_rate"] is None else "{:+.0%}".format(_latest["ramp_rate"])
+
+        _output = mo.vstack([
+            mo.hstack(
+                [
+                    mo.stat(label="Last 7 Days", bordered=True, value="{:,.2f} miles".format(_latest["miles_7d"])),
+                    mo.stat(label="Last 28 Days", bordered=True, value="{:,.2f} miles".format(_latest["miles_28d"])),
+                    mo.stat(label="Fitness (CTL)", bordered=True, value="{:.1f}".format(_latest["ctl"])),
+                    mo.stat(label="Fatigue (ATL)", bordered=True, value="{:.1f}".format(_latest["atl"])),
+                    mo.stat(label="Form (TSB)", bordered=True, value="{:+.1f}".format(_latest["tsb"])),
+                    mo.stat(label="Weekly Ramp Rate", bordered=True, value=_ramp_rate, caption=f"as of {_latest['date']}"),
+                ],
+                widths="equal",
+                gap=1
+            ),
+            training_load_chart(_year_load),
+        ])
+
+    _output
+    return (training_load_chart,)
 
 
 @app.cell
-def strava_import(client, pl):
-    _data = []
-    for activity in client.get_activities(after="2021-12-31"):
-        _dict = {
-            "name": activity.name,
-            "distance": activity.distance,
-            "elapsed_time": activity.elapsed_time,
-            "total_elevation_gain": activity.total_elevation_gain,
-            "type": activity.sport_type.root,
-            "workout_type": activity.workout_type,
-            "id": activity.id,
-            "start_date": activity.start_date_local,
-            "gear_id": activity.gear_id,
-            "average_speed": activity.average_speed,
-            "average_cadence": activity.average_cadence,
-            "average_heartrate": activity.average_heartrate,
-            "max_heartrate": activity.max_heartrate,
-            "elev_high": activity.elev_high,
-            "elev_low": activity.elev_low,
-            "external_id": activity.external_id,
-        }
+def date_range_controls(date, mo, timedelta):
+    select_range = mo.ui.dropdown(
+        options={"Last 4 weeks": 28, "Last 12 weeks": 84, "Last 26 weeks": 182, "Last 52 weeks": 364, "Custom": None},
+        value="Last 12 weeks",
+        label="Date Range",
+        full_width=True
+    )
+    custom_range = mo.ui.date_range(
+        value=(date.today() - timedelta(days=84), date.today()),
+        label="Custom Range",
+        full_width=True
+    )
+    return custom_range, select_range
 
-        _data.append(_dict)
 
-    df_runs_import = pl.DataFrame(_data).filter(pl.col("type") == "Run").drop("type")
-    df_rides_import = pl.DataFrame(_data).filter(pl.col("type") == "Ride").drop("type")
-    return activity, df_rides_import, df_runs_import
+@app.cell
+def date_range_display(
+    custom_range,
+    date,
+    format_yearly_metrics,
+    mileage_bar_chart,
+    mileage_cache,
+    mo,
+    races_index,
+    range_metrics,
+    runs_index,
+    select_athlete,
+    select_range,
+    timedelta,
+):
+    from running_dashboard.year_views import format_year_stats
+
+    if select_range.value is None:
+        range_start, range_end = custom_range.value
+    else:
+        range_start, range_end = date.today() - timedelta(days=select_range.value - 1), date.today()
+
+    # Both ranges are binary-searched slices of the date-sorted indexes.
+    _stats = format_year_stats(
+        format_yearly_metrics(
+            range_metrics(
+                runs_index.range(range_start, range_end, athlete_id=select_athlete.value),
+                races_index.range(range_start, range_end, athlete_id=select_athlete.value)
+            )
+        ).row(0, named=True)
+    )
+    _bin_size, _mileage = mileage_cache.for_span(range_start, range_end, athlete_id=select_athlete.value)
+
+    mo.vstack([
+        mo.hstack([select_range, custom_range], widths="equal", gap=1),
+        mo.hstack(
+            [
+                mo.stat(label="Total Miles", bordered=True, value=_stats["total_miles"]),
+                mo.stat(label="Average Run Pace", bordered=True, value=_stats["avg_run_pace"]),
+                mo.stat(label="No. of Races Ran", bordered=True, value=_stats["no_of_races"]),
+                mo.stat(label="No. of Race Miles Ran", bordered=True, value=_stats["race_miles"]),
+                mo.stat(label="Average Race Pace", bordered=True, value=_stats["avg_race_pace"]),
+            ],
+            widths="equal",
+            gap=1
+        ),
+        mileage_bar_chart(_mileage, bin_size=_bin_size),
+    ])
+    return format_year_stats, range_end, range_start
+
+
+@app.cell
+def date_indexes(DateIndex, df_runs, official_race_results_df):
+    # Rebuilt whenever the runs or race results change.
+    runs_index = DateIndex(df_runs)
+    races_index = DateIndex(official_race_results_df)
+    return races_index, runs_index
+
+
+@app.cell
+def personal_records_display(athlete_personal_records, mo, select_athlete):
+    _records = athlete_personal_records.get(select_athlete.value)
+    mo.vstack([
+        mo.md("### Personal Records"),
+        _records if _records is not None and not _records.is_empty()
+        else mo.md("Fetch activity details to find best efforts from each run's streams."),
+    ])
+    return
 
 
 @app.cell
-def race_history_via_google_sheets(gspread, pl):
-    _gc = gspread.service_account("./service_account.json")
-    _sh = _gc.open("Race History")
-    _worksheet = _sh.sheet1
+def plan_compliance_display(mo, pl, plan_compliance, select_athlete):
+    _weeks = plan_compliance.get(select_athlete.value)
+    if _weeks is None:
+        _output = mo.md("Track a plan from the Race Training App to compare it with your runs here.")
+    elif _weeks.is_empty():
+        _output = mo.md("The tracked plan hasn't started yet.")
+    else:
+        _this_week = _weeks.row(-1, named=True)
+        _totals = _weeks.select(pl.col("planned_miles", "actual_miles", "planned_runs", "completed_runs").sum()).row(0, named=True)
+        _compliance = "-" if not _totals["planned_miles"] else "{:.0%}".format(_totals["actual_miles"] / _totals["planned_miles"])
+
+        _output = mo.vstack([
+            mo.hstack(
+                [
+                    mo.stat(label="Plan Week", bordered=True, value=str(_this_week["week"]), caption=f"from {_this_week['week_start']}"),
+                    mo.stat(label="Miles This Week", bordered=True, value="{:,.1f} / {:,.1f}".format(_this_week["actual_miles"], _this_week["planned_miles"])),
+                    mo.stat(label="Runs This Week", bordered=True, value="{} / {}".format(_this_week["completed_runs"], _this_week["planned_runs"])),
+                    mo.stat(label="Plan Mileage So Far", bordered=True, value=_compliance),
+                    mo.stat(label="Plan Runs So Far", bordered=True, value="{} / {}".format(_totals["completed_runs"], _totals["planned_runs"])),
+                ],
+                widths="equal",
+                gap=1
+            ),
+            _weeks.sort("week", descending=True).select(
+                "week",
+                "week_start",
+                pl.col("planned_miles").round(2),
+                pl.col("actual_miles").round(2),
+                (pl.col("mileage_compliance") * 100).round(0).alias("mileage_%"),
+                pl.format("{} / {}", "completed_runs", "planned_runs").alias("runs"),
+                "unplanned_runs",
+            ),
+        ])
+
+    mo.vstack([mo.md("### Training Plan Compliance"), _output])
+    return
+
 
-    official_race_results_df_import = (
-        pl.DataFrame(_worksheet.get_all_records())
-        .with_columns(
-            pl.col("date").str.to_date(),
-            pl.col("official_time_in_seconds", "official_pace_in_seconds").cast(pl.Int32, strict=False)
+@app.cell
+def performance_panel(
+    activity_details_summary,
+    athlete_personal_records,
+    metrics,
+    mo,
+    pl,
+    plan_compliance,
+    training_load,
+    year_view,
+):
+    # Uses the instrumented cells' outputs so it runs after them, then writes
+    # the JSON-lines log and the Prometheus file under data/metrics/.
+    _measured = (activity_details_summary, athlete_personal_records, plan_compliance, training_load, year_view)
+    metrics.flush()
+
+    _values = pl.DataFrame(
+        metrics.values(),
+        schema={"metric": pl.String, "stage": pl.String, "service": pl.String, "status": pl.Int64,
+                "cache": pl.String, "result": pl.String, "value": pl.Float64},
+    )
+    _stages = (
+        _values
+        .filter(pl.col("metric") == "dashboard_stage_seconds")
+        .select("stage", (pl.col("value") * 1000).round(1).alias("last_run_ms"))
+        .sort("last_run_ms", descending=True)
+    )
+    _http = (
+        _values
+        .filter(pl.col("service").is_not_null())
+        .group_by("service")
+        .agg(
+            pl.col("value").filter(pl.col("metric") == "dashboard_http_requests_total").sum().alias("calls"),
+            pl.col("value").filter(pl.col("metric") == "dashboard_http_response_bytes_total").sum().alias("bytes"),
         )
+        .sort("service")
     )
+    _caches = (
+        _values
+        .filter(pl.col("cache").is_not_null())
+        .group_by("cache")
+        .agg((pl.col("value").filter(pl.col("result") == "hit").sum() / pl.col("value").sum()).round(3).alias("hit_ratio"))
+        .sort("cache")
+    )
+
+    mo.accordion({
+        "Performance": mo.vstack([
+            mo.md("**Stage timings**"), _stages,
+            mo.md("**API calls**"), _http,
+            mo.md("**Cache hit ratios**"), _caches,
+        ])
+    })
+    return
+
+
+@app.cell
+def mileage_chart_data(MileageBinCache, df_runs):
+    # Rebuilt, and so invalidated, whenever df_runs changes.
+    mileage_cache = MileageBinCache(df_runs)
+    return (mileage_cache,)
+
+
+@app.cell
+def _(dashboard_snapshot, df_runs_import, metrics, transform_runs):
+    with metrics.stage("df_runs"):
+        df_runs = dashboard_snapshot.runs if dashboard_snapshot is not None else transform_runs(df_runs_import)
+    return (df_runs,)
+
+
+@app.cell
+def sync_workers():
+    # Defined once per session, so a re-run of the cell below can stop the
+    # worker it replaces instead of leaving its thread syncing.
+    sync_workers = {}
+    return (sync_workers,)
+
+
+@app.cell
+def background_sync(
+    BackgroundSync,
+    DASHBOARD_CASSETTE_MODE,
+    SyncResult,
+    athletes,
+    clients,
+    replay_dashboard_frames,
+    sheets_client_factory,
+    stored_dashboard_frames,
+    sync_dashboard_frames,
+    sync_workers,
+):
+    # Strava and Google Sheets are synced on a worker thread, so the dashboard
+    # opens on the frames stored by the last sync and swaps in new ones as
+    # they arrive. Only the very first run, with nothing stored, waits.
+    # Replay reads the cassettes alone and never touches the local stores.
+    SYNC_INTERVAL_MINUTES = 15
+    STRAVA_SYNC_LOOKBACK_DAYS = 7
+
+    if "worker" in sync_workers:
+        sync_workers.pop("worker").stop()
+
+    if clients is not None:
+        if DASHBOARD_CASSETTE_MODE == "replay":
+            _sync, _stored = (lambda: replay_dashboard_frames(athletes)), None
+        else:
+            _client_factory = sheets_client_factory("./service_account.json", timeout=10, cassette_mode=DASHBOARD_CASSETTE_MODE)
+            _sync = lambda: sync_dashboard_frames(clients, athletes, _client_factory, lookback_days=STRAVA_SYNC_LOOKBACK_DAYS)
+            _stored = stored_dashboard_frames(athletes)
+        sync_worker = BackgroundSync(
+            _sync,
+            interval=SYNC_INTERVAL_MINUTES * 60,
+            initial=SyncResult(None, *_stored) if _stored is not None else None,
+        )
+        if _stored is None and sync_worker.run_once() is None:
+            raise RuntimeError(f"First sync failed: {sync_worker.status()['last_error']}")
+        sync_workers["worker"] = sync_worker.start(run_now=_stored is not None)
+    else:
+        sync_worker = None
+    return STRAVA_SYNC_LOOKBACK_DAYS, SYNC_INTERVAL_MINUTES, sync_worker
+
+
+@app.cell
+def synced_frames_state(mo, sync_worker):
+    get_synced_frames, set_synced_frames = mo.state(sync_worker.latest if sync_worker is not None else None)
+    return get_synced_frames, set_synced_frames
+
+
+@app.cell
+def strava_import(get_synced_frames, split_activities):
+    if get_synced_frames() is not None:
+        df_activities_import = get_synced_frames().activities
+        df_runs_import, df_rides_import = split_activities(df_activities_import)
+    else:
+        df_activities_import = df_runs_import = df_rides_import = None
+    return df_activities_import, df_rides_import, df_runs_import
+
+
+@app.cell
+def _(mo):
+    fetch_activity_details_button = mo.ui.run_button(label="Fetch laps, splits & streams")
+    fetch_activity_details_button
+    return (fetch_activity_details_button,)
+
+
+@app.cell
+def strava_activity_details(
+    DASHBOARD_CASSETTE_MODE,
+    clients,
+    df_runs_import,
+    fetch_activity_details_button,
+    metrics,
+    mo,
+    pl,
+):
+    # Not stopped when idle, so the personal records below still load from
+    # whatever streams are already stored.
+    activity_details_summary = None
+    if clients is not None and DASHBOARD_CASSETTE_MODE != "replay" and fetch_activity_details_button.value:
+        from running_dashboard.activity_details import ActivityDetailFetcher
+
+        with metrics.stage("strava_activity_details"):
+            activity_details_summary = {
+                _athlete_id: ActivityDetailFetcher(access_token=_client.access_token).fetch_all(
+                    df_runs_import.filter(pl.col("athlete_id") == _athlete_id)["id"].to_list()
+                )
+                for _athlete_id, _client in clients.items()
+            }
+    activity_details_summary
+    return (activity_details_summary,)
+
+
+@app.cell
+def personal_records_generation(
+    DASHBOARD_CASSETTE_MODE,
+    activity_details_summary,
+    dashboard_snapshot,
+    df_runs,
+    metrics,
+):
+    from running_dashboard.streams import athlete_best_efforts, ingest_cached_streams, personal_records
+
+    # Depends on the detail fetch only so it re-runs, and ingests, after one.
+    _fetched = activity_details_summary
+    athlete_personal_records = {}
+    with metrics.stage("personal_records"):
+        for (_athlete_id,), _runs in df_runs.partition_by("athlete_id", as_dict=True).items():
+            if dashboard_snapshot is None and DASHBOARD_CASSETTE_MODE != "replay":
+                # Move any fetched-but-unstored streams into the Arrow store
+                # first; replay leaves the local stores untouched.
+                ingest_cached_streams(_runs["id"].to_list(), _athlete_id)
+            athlete_personal_records[_athlete_id] = personal_records(athlete_best_efforts(_athlete_id), _runs)
+    return athlete_best_efforts, athlete_personal_records, ingest_cached_streams, personal_records
+
+
+@app.cell
+def race_history_via_google_sheets(dashboard_snapshot, get_synced_frames, pl):
+    if dashboard_snapshot is not None:
+        official_race_results_df_import = dashboard_snapshot.race_results
+    else:
+        official_race_results_df_import = get_synced_frames().race_results
 
     race_schedule = official_race_results_df_import.filter(pl.col("official_time").is_null())
     official_race_results_df = official_race_results_df_import.filter(pl.col("official_time_in_seconds").is_not_null())
@@ -400,38 +717,57 @@ def race_history_via_google_sheets(gspread, pl):
 
 @app.cell
 def yearly_metrics_generation(
+    dashboard_snapshot,
     datetime,
     df_runs,
-    get_avg_race_pace,
-    get_avg_run_pace,
-    get_no_of_races,
-    get_race_miles,
-    get_total_miles,
+    format_yearly_metrics,
+    metrics,
     official_race_results_df,
+    yearly_metrics_table,
 ):
-    yearly_metrics = dict.fromkeys(range(2022, datetime.today().year + 1))
+    if dashboard_snapshot is not None:
+        yearly_metrics = dashboard_snapshot.yearly_metrics
+    else:
+        with metrics.stage("yearly_metrics_generation"):
+            yearly_metrics = format_yearly_metrics(
+                yearly_metrics_table(
+                    df_runs=df_runs,
+                    race_results=official_race_results_df,
+                    last_year=datetime.today().year
+                )
+            )
+    return (yearly_metrics,)
 
-    for year in range(2022, datetime.today().year + 1):    
-        _output_total_miles = get_total_miles(df=df_runs, year=year)
-        _output_avg_run_pace = get_avg_run_pace(df=df_runs, year=year)
-        _output_no_of_races = get_no_of_races(df=official_race_results_df, year=year)
-        _output_race_miles = get_race_miles(df=official_race_results_df, year=year)
-        _output_avg_race_pace = get_avg_race_pace(df=official_race_results_df, year=year)
 
-        yearly_metrics[year] = _output_total_miles | _output_avg_run_pace | _output_no_of_races | _output_race_miles | _output_avg_race_pace
-    return year, yearly_metrics
+@app.cell
+def plan_compliance_generation(df_runs, metrics, read_active_plan, weekly_compliance):
+    # Re-parsed and re-joined on every df_runs refresh; a plan is a few
+    # hundred days, so this costs milliseconds.
+    plan_compliance = {}
+    with metrics.stage("plan_compliance"):
+        for (_athlete_id,), _runs in df_runs.partition_by("athlete_id", as_dict=True).items():
+            _plan = read_active_plan(_athlete_id)
+            if _plan is not None:
+                plan_compliance[_athlete_id] = weekly_compliance(_plan, _runs)
+    return (plan_compliance,)
 
 
 @app.cell
-def _(df_runs, pl):
-    (
-        df_runs
-        .select("date")
-        .filter(pl.col("date").dt.year() == 2025)
-        .with_columns(pl.col("date").dt.week().alias("week"))
-        .upsample(time_column="date", every="1d")
-    )
-    return
+def training_load_engines():
+    # Defined once per session and updated in place, so a refreshed df_runs
+    # only recomputes each athlete's series from the first changed day.
+    training_load_engines = {}
+    return (training_load_engines,)
+
+
+@app.cell
+def training_load_generation(TrainingLoad, df_runs, metrics, training_load_engines):
+    with metrics.stage("training_load"):
+        training_load = {
+            _athlete_id: training_load_engines.setdefault(_athlete_id, TrainingLoad()).update(_runs)
+            for (_athlete_id,), _runs in df_runs.partition_by("athlete_id", as_dict=True).items()
+        }
+    return (training_load,)
 
 
 @app.cell
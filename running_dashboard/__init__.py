@@ -0,0 +1 @@
+"""Reusable building blocks for the running dashboard notebooks."""
@@ -0,0 +1,41 @@
+"""
+Command line entry point.
+
+    python -m running_dashboard snapshot [--out data/snapshots] [--offline] [--cassettes record|replay]
+"""
+
+import argparse
+from datetime import datetime
+
+from running_dashboard.cassettes import CASSETTE_MODES
+from running_dashboard.pipeline import load_dashboard_frames
+from running_dashboard.snapshot import SNAPSHOT_ROOT, build_snapshot, write_snapshot
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m running_dashboard")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snapshot = commands.add_parser("snapshot", help="Precompute a read-only dashboard snapshot.")
+    snapshot.add_argument("--out", default=SNAPSHOT_ROOT, help="Snapshot root directory.")
+    snapshot.add_argument(
+        "--offline",
+        action="store_true",
+        help="Build from the local activity store and cached race history without syncing.",
+    )
+    snapshot.add_argument(
+        "--cassettes",
+        choices=CASSETTE_MODES,
+        help="Record the Strava and Sheets responses to data/cassettes, or replay them offline.",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshot":
+        df_runs, race_results = load_dashboard_frames(offline=args.offline, cassette_mode=args.cassettes)
+        version_dir = write_snapshot(build_snapshot(df_runs, race_results, last_year=datetime.today().year), root=args.out)
+        print(f"Wrote snapshot to {version_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Concurrent, rate-limit-aware fetcher for per-activity details and streams."""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from running_dashboard.instrumentation import metrics
+
+STRAVA_API_URL = "https://www.strava.com/api/v3"
+ACTIVITY_DETAILS_DIR = "data/activity_details"
+STREAM_KEYS = ["time", "distance", "latlng", "altitude", "heartrate", "velocity_smooth", "cadence"]
+
+SHORT_WINDOW_SECS = 15 * 60
+DAILY_WINDOW_SECS = 24 * 60 * 60
+
+
+class TokenBucket:
+    """A bucket of `capacity` tokens that refills evenly over `period` seconds."""
+
+    def __init__(self, capacity: int, period: float, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def set_remaining(self, capacity: int, remaining: int) -> None:
+        self._refill()
+        self.rate = self.rate * capacity / self.capacity
+        self.capacity = capacity
+        self.tokens = float(max(0, min(capacity, remaining)))
+
+
+def seconds_until_reset(window: float, now: float) -> float:
+    """
+    Seconds from wall-clock `now` until Strava next resets a quota window.
+    The 15-minute window resets on the quarter hour and the daily one at
+    midnight UTC, both whole multiples of `window` since the epoch.
+    """
+    return window - now % window
+
+
+class StravaRateLimiter:
+    """
+    Schedules requests against Strava's 15-minute and daily quotas.
+
+    Both quotas are token buckets; every request takes one token from each.
+    Responses carry the server's view of usage in the `X-RateLimit-*` (or
+    `X-ReadRateLimit-*`) headers, which re-synchronises the buckets so
+    requests made by other processes are accounted for too.
+
+    Strava's windows reset at fixed times rather than refilling evenly, so
+    once a window is used up (or a 429 arrives) every request waits until
+    that window's next reset on `wall_clock`.
+    """
+
+    def __init__(
+        self,
+        short_limit: int = 100,
+        daily_limit: int = 1000,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        wall_clock=time.time,
+    ):
+        self.short = TokenBucket(short_limit, SHORT_WINDOW_SECS, clock=clock)
+        self.daily = TokenBucket(daily_limit, DAILY_WINDOW_SECS, clock=clock)
+        self._sleep = sleep
+        self._wall_clock = wall_clock
+        self._blocked_until = None
+        self._blocked_buckets = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            while True:
+                if self._blocked_until is not None:
+                    blocked = self._blocked_until - self._wall_clock()
+                    if blocked > 0:
+                        self._sleep(blocked)
+                        continue
+                    # The exhausted window has reset, so its quota is whole again.
+                    for bucket in self._blocked_buckets:
+                        bucket.set_remaining(bucket.capacity, bucket.capacity)
+                    self._blocked_until, self._blocked_buckets = None, []
+
+                wait = max(self.short.wait_time(), self.daily.wait_time())
+                if wait <= 0:
+                    self.short.consume()
+                    self.daily.consume()
+                    return
+                self._sleep(wait)
+
+    def _block_until_reset(self, window: float, *buckets: TokenBucket) -> None:
+        now = self._wall_clock()
+        self._blocked_until = max(self._blocked_until or now, now + seconds_until_reset(window, now))
+        self._blocked_buckets.extend(bucket for bucket in buckets if bucket not in self._blocked_buckets)
+
+    def update_from_headers(self, headers, rate_limited: bool = False) -> None:
+        """
+        Re-synchronise with the server's usage. With `rate_limited` (a 429)
+        requests wait for the next reset of the exhausted window, the
+        15-minute one if the headers don't say which.
+        """
+        for prefix in ("X-ReadRateLimit", "X-RateLimit"):
+            limit, usage = headers.get(f"{prefix}-Limit"), headers.get(f"{prefix}-Usage")
+            if limit and usage:
+                break
+        else:
+            if rate_limited:
+                with self._lock:
+                    self._block_until_reset(SHORT_WINDOW_SECS, self.short)
+            return
+
+        short_limit, daily_limit = (int(n) for n in limit.split(","))
+        short_usage, daily_usage = (int(n) for n in usage.split(","))
+        with self._lock:
+            self.short.set_remaining(short_limit, short_limit - short_usage)
+            self.daily.set_remaining(daily_limit, daily_limit - daily_usage)
+            if daily_usage >= daily_limit:
+                # Midnight UTC is also a quarter hour, so both windows reset.
+                self._block_until_reset(DAILY_WINDOW_SECS, self.daily, self.short)
+            elif short_usage >= short_limit or rate_limited:
+                self._block_until_reset(SHORT_WINDOW_SECS, self.short)
+
+
+def _cache_path(cache_dir: str, activity_id: int) -> str:
+    return os.path.join(cache_dir, f"{activity_id}.json")
+
+
+def load_cached_details(activity_id: int, cache_dir: str = ACTIVITY_DETAILS_DIR) -> dict | None:
+    """Return the cached detail/streams payload for an activity, if any."""
+    _path = _cache_path(cache_dir, activity_id)
+    if not os.path.exists(_path):
+        return None
+    with open(_path, "r") as _f:
+        return json.load(_f)
+
+
+def _write_cached_details(payload: dict, activity_id: int, cache_dir: str) -> None:
+    _path = _cache_path(cache_dir, activity_id)
+    _tmp_path = f"{_path}.tmp"
+    with open(_tmp_path, "w") as _f:
+        json.dump(payload, _f)
+    os.replace(_tmp_path, _path)
+
+
+class ActivityDetailFetcher:
+    """
+    Fetches detailed activities (laps, splits) and streams on a thread pool.
+
+    Every activity is written to its own JSON file in `cache_dir` as soon as
+    it completes, so an interrupted run resumes by skipping the files that
+    already exist.
+
+    Example
+    --------
+    >>> fetcher = ActivityDetailFetcher(access_token=client.access_token)
+    >>> fetcher.fetch_all(df_runs_import["id"].to_list())
+    {'fetched': 120, 'cached': 2880, 'failed': []}
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        cache_dir: str = ACTIVITY_DETAILS_DIR,
+        base_url: str = STRAVA_API_URL,
+        limiter: StravaRateLimiter | None = None,
+        max_workers: int = 8,
+        max_retries: int = 3,
+        timeout: float = 30,
+    ):
+        self.access_token = access_token
+        self.cache_dir = cache_dir
+        self.base_url = base_url.rstrip("/")
+        self.limiter = limiter or StravaRateLimiter()
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+            self._local.session.headers["Authorization"] = f"Bearer {self.access_token}"
+            metrics.instrument_session(self._local.session, "strava")
+        return self._local.session
+
+    def _get(self, path: str, params: dict | None = None):
+        for _attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            response = self._session().get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+            self.limiter.update_from_headers(response.headers, rate_limited=response.status_code == 429)
+            if response.status_code == 429 or response.status_code >= 500:
+                continue
+            response.raise_for_status()
+            return response.json()
+        response.raise_for_status()
+
+    def fetch_one(self, activity_id: int) -> dict:
+        payload = {
+            "activity": self._get(f"/activities/{activity_id}", params={"include_all_efforts": "false"}),
+            "streams": self._get(
+                f"/activities/{activity_id}/streams",
+                params={"keys": ",".join(STREAM_KEYS), "key_by_type": "true"},
+            ),
+        }
+        _write_cached_details(payload, activity_id, self.cache_dir)
+        return payload
+
+    def fetch_all(self, activity_ids) -> dict:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        pending = [_id for _id in activity_ids if not os.path.exists(_cache_path(self.cache_dir, _id))]
+        summary = {"fetched": 0, "cached": len(activity_ids) - len(pending), "failed": []}
+        metrics.cache("activity_details", hit=True, count=summary["cached"])
+        metrics.cache("activity_details", hit=False, count=len(pending))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.fetch_one, _id): _id for _id in pending}
+            for future in as_completed(futures):
+                if future.exception() is None:
+                    summary["fetched"] += 1
+                else:
+                    summary["failed"].append(futures[future])
+        return summary
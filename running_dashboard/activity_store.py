@@ -0,0 +1,311 @@
+"""Local Parquet store of Strava activity summaries with incremental sync."""
+
+import glob
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import polars as pl
+
+ACTIVITY_PARTITIONS_ROOT = "data/activities"
+# The single-file store used before the per-athlete partitions. It held the
+# token-file athlete's activities, i.e. `athletes.DEFAULT_ATHLETE`.
+LEGACY_ACTIVITY_STORE_PATH = "data/strava_activities.parquet"
+LEGACY_STORE_ATHLETE_ID = 0
+DEFAULT_SYNC_START = datetime(2021, 12, 31)
+# Strava's largest page size for the activity list.
+STRAVA_PAGE_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_SCHEMA = {
+    "name": pl.String,
+    "distance": pl.Float64,
+    "elapsed_time": pl.Int64,
+    "total_elevation_gain": pl.Float64,
+    "type": pl.String,
+    "workout_type": pl.Int64,
+    "id": pl.Int64,
+    "start_date": pl.Datetime("us"),
+    "gear_id": pl.String,
+    "average_speed": pl.Float64,
+    "average_cadence": pl.Float64,
+    "average_heartrate": pl.Float64,
+    "max_heartrate": pl.Float64,
+    "elev_high": pl.Float64,
+    "elev_low": pl.Float64,
+    "external_id": pl.String,
+}
+
+
+def _as_float(value):
+    return None if value is None else float(value)
+
+
+def _as_int(value):
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    return int(value)
+
+
+def activity_to_record(activity) -> dict:
+    """Flatten a stravalib summary activity into plain Python values."""
+    return {
+        "name": activity.name,
+        "distance": _as_float(activity.distance),
+        "elapsed_time": _as_int(activity.elapsed_time),
+        "total_elevation_gain": _as_float(activity.total_elevation_gain),
+        "type": activity.sport_type.root,
+        "workout_type": _as_int(activity.workout_type),
+        "id": activity.id,
+        "start_date": activity.start_date_local,
+        "gear_id": activity.gear_id,
+        "average_speed": _as_float(activity.average_speed),
+        "average_cadence": _as_float(activity.average_cadence),
+        "average_heartrate": _as_float(activity.average_heartrate),
+        "max_heartrate": _as_float(activity.max_heartrate),
+        "elev_high": _as_float(activity.elev_high),
+        "elev_low": _as_float(activity.elev_low),
+        "external_id": activity.external_id,
+    }
+
+
+def write_activity_store(df: pl.DataFrame, path: str) -> None:
+    """
+    Write the store atomically so a crashed sync never leaves a torn file.
+    Each write goes through its own temp file, so the background sync and a
+    snapshot rewriting the same partition never clobber each other's.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _fd, _tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(_fd)
+    try:
+        df.write_parquet(_tmp_path)
+        os.replace(_tmp_path, path)
+    except BaseException:
+        os.remove(_tmp_path)
+        raise
+
+
+def sync_watermark(df: pl.DataFrame, lookback_days: int = 7) -> datetime:
+    """
+    Parameters
+    ----------
+    df : polars DataFrame
+        The stored activities.
+
+    lookback_days : int
+        How far before the newest stored activity to re-fetch, so edits made
+        on Strava after the last sync are picked up.
+
+    Returns
+    -------
+    datetime
+        The `after` value to hand to `client.get_activities`.
+    """
+    newest = df.select(pl.col("start_date").max()).item()
+    if newest is None:
+        return DEFAULT_SYNC_START
+    return max(DEFAULT_SYNC_START, newest - timedelta(days=lookback_days))
+
+
+class ActivityFrameBuilder:
+    """
+    Builds an `ACTIVITY_SCHEMA` frame from stravalib activities one page at
+    a time.
+
+    Values are converted to plain Python as they arrive and appended to one
+    list per column. Every `page_size` activities the lists become a typed
+    chunk and are emptied, so only a page of Python objects is alive at any
+    point and the schema is never inferred.
+
+    Example
+    --------
+    >>> builder = ActivityFrameBuilder()
+    >>> for activity in client.get_activities(after=after):
+    ...     builder.append(activity)
+    >>> df_activities = builder.build()
+    """
+
+    def __init__(self, schema: dict = ACTIVITY_SCHEMA, page_size: int = STRAVA_PAGE_SIZE):
+        self.schema = schema
+        self.page_size = page_size
+        self._columns = {name: [] for name in schema}
+        self._chunks = []
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for chunk in self._chunks) + len(self._columns["id"])
+
+    def append(self, activity) -> None:
+        for name, value in activity_to_record(activity).items():
+            self._columns[name].append(value)
+        if len(self._columns["id"]) >= self.page_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._columns["id"]:
+            self._chunks.append(pl.DataFrame(self._columns, schema=self.schema))
+            self._columns = {name: [] for name in self.schema}
+
+    def build(self) -> pl.DataFrame:
+        """Every appended activity as one frame, without copying the chunks together."""
+        self._flush()
+        if not self._chunks:
+            return pl.DataFrame(schema=self.schema)
+        return pl.concat(self._chunks, rechunk=False)
+
+
+def fetch_activities(client, after: datetime, page_size: int = STRAVA_PAGE_SIZE) -> pl.DataFrame:
+    """Every activity started after `after`, as a frame matching `ACTIVITY_SCHEMA`."""
+    builder = ActivityFrameBuilder(page_size=page_size)
+    for activity in client.get_activities(after=after):
+        builder.append(activity)
+    return builder.build()
+
+
+def merge_activities(stored: pl.DataFrame, fetched: pl.DataFrame) -> pl.DataFrame:
+    """Upsert `fetched` into `stored` by `id`, preferring the fetched copy."""
+    return (
+        pl.concat([fetched, stored], how="vertical_relaxed")
+        .unique(subset="id", keep="first", maintain_order=True)
+        .sort("start_date")
+    )
+
+
+def partition_by_sport(df: pl.DataFrame) -> dict[str, pl.DataFrame]:
+    """Split activities by "type" in a single pass, dropping the "type" column."""
+    return {sport: part for (sport,), part in df.partition_by("type", as_dict=True, include_key=False).items()}
+
+
+def split_activities(df: pl.DataFrame) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Return the (runs, rides) frames the dashboard expects."""
+    by_sport = partition_by_sport(df)
+    no_activities = df.clear().drop("type")
+    return by_sport.get("Run", no_activities), by_sport.get("Ride", no_activities)
+
+
+def _athlete_dir(root: str, athlete_id: int) -> str:
+    return os.path.join(root, f"athlete_id={athlete_id}")
+
+
+def migrate_legacy_store(root: str = ACTIVITY_PARTITIONS_ROOT, legacy_path: str = LEGACY_ACTIVITY_STORE_PATH) -> bool:
+    """
+    Seed `LEGACY_STORE_ATHLETE_ID`'s partitions from the old single-file
+    store, so upgrading doesn't re-download the whole history. The old file
+    is then renamed to "<path>.migrated". Returns whether anything moved.
+    """
+    if not os.path.exists(legacy_path):
+        return False
+    if not glob.glob(os.path.join(_athlete_dir(root, LEGACY_STORE_ATHLETE_ID), "year=*", "*.parquet")):
+        legacy = pl.read_parquet(legacy_path)
+        years = legacy.select(pl.col("start_date").dt.year().unique()).to_series().to_list()
+        write_athlete_partitions(legacy, LEGACY_STORE_ATHLETE_ID, years, root)
+    os.replace(legacy_path, f"{legacy_path}.migrated")
+    return True
+
+
+def load_athlete_activities(athlete_id: int, root: str = ACTIVITY_PARTITIONS_ROOT) -> pl.DataFrame:
+    """Read one athlete's activities from every year partition."""
+    if athlete_id == LEGACY_STORE_ATHLETE_ID:
+        migrate_legacy_store(root)
+    files = sorted(glob.glob(os.path.join(_athlete_dir(root, athlete_id), "year=*", "*.parquet")))
+    if not files:
+        return pl.DataFrame(schema=ACTIVITY_SCHEMA)
+    return pl.read_parquet(files)
+
+
+def write_athlete_partitions(df: pl.DataFrame, athlete_id: int, years, root: str = ACTIVITY_PARTITIONS_ROOT) -> None:
+    """Atomically rewrite the `years` partitions of one athlete from `df`."""
+    for year in years:
+        year_dir = os.path.join(_athlete_dir(root, athlete_id), f"year={year}")
+        os.makedirs(year_dir, exist_ok=True)
+        write_activity_store(
+            df.filter(pl.col("start_date").dt.year() == year),
+            os.path.join(year_dir, "activities.parquet"),
+        )
+
+
+def sync_athlete_activities(
+    client,
+    athlete_id: int,
+    root: str = ACTIVITY_PARTITIONS_ROOT,
+    lookback_days: int = 7,
+) -> pl.DataFrame:
+    """
+    Fetch one athlete's activities newer than their stored watermark and
+    merge them in. Only the year partitions that received new or edited
+    activities are rewritten.
+    """
+    stored = load_athlete_activities(athlete_id, root)
+    fetched = fetch_activities(client, after=sync_watermark(stored, lookback_days=lookback_days))
+    if fetched.is_empty():
+        return stored
+
+    touched_years = (
+        pl.concat([fetched, stored.filter(pl.col("id").is_in(fetched["id"].implode()))])
+        .select(pl.col("start_date").dt.year().unique())
+        .to_series()
+        .to_list()
+    )
+    merged = merge_activities(stored, fetched)
+    write_athlete_partitions(merged, athlete_id, touched_years, root)
+    return merged
+
+
+def load_team_activities(root: str = ACTIVITY_PARTITIONS_ROOT) -> pl.DataFrame:
+    """Every athlete's activities with an "athlete_id" column, read via hive partitioning."""
+    migrate_legacy_store(root)
+    if not glob.glob(os.path.join(root, "athlete_id=*", "year=*", "*.parquet")):
+        return pl.DataFrame(schema={"athlete_id": pl.Int64, **ACTIVITY_SCHEMA})
+    return (
+        pl.scan_parquet(os.path.join(root, "**", "*.parquet"), hive_partitioning=True)
+        .select(pl.col("athlete_id").cast(pl.Int64), *ACTIVITY_SCHEMA)
+        .collect()
+    )
+
+
+def sync_team(
+    clients: dict,
+    root: str = ACTIVITY_PARTITIONS_ROOT,
+    lookback_days: int = 7,
+    max_workers: int = 4,
+) -> pl.DataFrame:
+    """
+    Parameters
+    ----------
+    clients : dict
+        Authenticated stravalib clients keyed by athlete_id.
+
+    root : str
+        Root of the store, partitioned as `athlete_id=<id>/year=<year>/`.
+
+    lookback_days : int
+        Passed on to `sync_athlete_activities`.
+
+    max_workers : int
+        Number of athletes synced at the same time.
+
+    Returns
+    -------
+    polars DataFrame
+        Every stored activity of every athlete. An athlete whose sync fails
+        keeps their previously stored activities, and the failure is logged
+        as a warning.
+
+    Example
+    --------
+    >>> sync_team({123: client_a, 456: client_b}, lookback_days=7)
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            athlete_id: pool.submit(sync_athlete_activities, client, athlete_id, root, lookback_days)
+            for athlete_id, client in clients.items()
+        }
+    for athlete_id, future in futures.items():
+        if future.exception() is not None:
+            logger.warning("Could not sync athlete %s: %s; using stored activities.", athlete_id, future.exception())
+    return load_team_activities(root)
@@ -0,0 +1,34 @@
+"""The athletes a dashboard instance syncs and displays."""
+
+import json
+import os
+from dataclasses import dataclass
+
+ATHLETES_PATH = "athletes.json"
+
+
+@dataclass(frozen=True)
+class Athlete:
+    """
+    One athlete's identity and where their credentials and race history live.
+
+    `athletes.json` holds a list of these, e.g.
+    `[{"athlete_id": 123, "name": "Jon", "token_path": "tokens/123.json",
+    "race_history_sheet": "Race History"}]`.
+    """
+
+    athlete_id: int
+    name: str
+    token_path: str = "strava_token.json"
+    race_history_sheet: str | None = None
+
+
+DEFAULT_ATHLETE = Athlete(athlete_id=0, name="Me", token_path="strava_token.json", race_history_sheet="Race History")
+
+
+def load_athletes(path: str = ATHLETES_PATH) -> list[Athlete]:
+    """The configured team, or the single token-file athlete if there is no config."""
+    if not os.path.exists(path):
+        return [DEFAULT_ATHLETE]
+    with open(path, "r") as _f:
+        return [Athlete(**athlete) for athlete in json.load(_f)]
@@ -0,0 +1,130 @@
+"""A background worker that keeps the dashboard's frames synced on an interval."""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import polars as pl
+
+SYNC_INTERVAL_SECS = 15 * 60
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    """One complete, never-mutated set of synced frames."""
+
+    # None for frames read back from the local stores rather than synced.
+    synced_at: datetime | None
+    activities: pl.DataFrame
+    race_results: pl.DataFrame
+
+
+class BackgroundSync:
+    """
+    Runs `sync` on a daemon thread, once on start and then every `interval`
+    seconds, and publishes a new `SyncResult` when a sync returns frames
+    that differ from the latest ones.
+
+    The reference to the latest result is swapped under a lock, so a reader
+    always sees either the previous frames or the new ones, never a mix. A
+    sync that changed nothing keeps the same `SyncResult` object, so readers
+    comparing by identity don't rebuild anything. A failed sync keeps the
+    previous result and records the error instead.
+
+    Parameters
+    ----------
+    sync : callable
+        Returns (activities, race_results), e.g. `pipeline.sync_dashboard_frames`
+        with its arguments bound.
+
+    interval : float
+        Seconds between the end of one sync and the start of the next.
+
+    initial : SyncResult
+        Published before the first sync completes, e.g. the stored frames.
+
+    Example
+    --------
+    >>> worker = BackgroundSync(lambda: sync_dashboard_frames(clients, athletes, client_factory))
+    >>> worker.start()
+    >>> worker.latest.synced_at
+    """
+
+    def __init__(self, sync, interval: float = SYNC_INTERVAL_SECS, initial: SyncResult | None = None, clock=datetime.now):
+        self._sync = sync
+        self.interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latest = initial
+        self._last_error = None
+        self._checked_at = None
+        self._syncing = False
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def latest(self) -> SyncResult | None:
+        with self._lock:
+            return self._latest
+
+    def status(self) -> dict:
+        """
+        Whether a sync is running, when the last one succeeded (changed
+        anything or not) and the last error, if the last sync failed.
+        """
+        with self._lock:
+            return {"syncing": self._syncing, "checked_at": self._checked_at, "last_error": self._last_error}
+
+    def _unchanged(self, activities: pl.DataFrame, race_results: pl.DataFrame) -> bool:
+        latest = self.latest
+        return (
+            latest is not None
+            and activities.equals(latest.activities)
+            and race_results.equals(latest.race_results)
+        )
+
+    def run_once(self) -> SyncResult | None:
+        """Sync once and return the latest result, which is unchanged if the frames were."""
+        with self._lock:
+            self._syncing = True
+        try:
+            activities, race_results = self._sync()
+        except Exception as e:
+            with self._lock:
+                self._syncing = False
+                self._last_error = f"{type(e).__name__}: {e}"
+            return None
+
+        checked_at = self._clock()
+        unchanged = self._unchanged(activities, race_results)
+        with self._lock:
+            if not unchanged:
+                self._latest = SyncResult(synced_at=checked_at, activities=activities, race_results=race_results)
+            self._checked_at = checked_at
+            self._last_error = None
+            self._syncing = False
+            return self._latest
+
+    def _run(self, run_now: bool) -> None:
+        while not self._stopped.is_set():
+            if run_now:
+                self.run_once()
+            run_now = True
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self, run_now: bool = True) -> "BackgroundSync":
+        """Start the worker thread, waiting one `interval` first unless `run_now`."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(run_now,), name="dashboard-sync", daemon=True)
+            self._thread.start()
+        return self
+
+    def sync_now(self) -> None:
+        """Start the next sync without waiting for the interval."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
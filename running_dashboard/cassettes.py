@@ -0,0 +1,186 @@
+"""Record Strava and Google Sheets responses once, then replay them offline."""
+
+import gzip
+import json
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import polars as pl
+
+from running_dashboard.activity_store import ACTIVITY_SCHEMA, activity_to_record, merge_activities
+from running_dashboard.race_history import parse_race_records
+
+CASSETTE_ROOT = "data/cassettes"
+CASSETTE_MODES = ["record", "replay"]
+
+
+def strava_cassette_path(athlete_id: int, root: str = CASSETTE_ROOT) -> str:
+    return os.path.join(root, "strava", f"{athlete_id}.parquet")
+
+
+def sheets_cassette_path(sheet_name: str, root: str = CASSETTE_ROOT) -> str:
+    return os.path.join(root, "sheets", f"{sheet_name}.json.gz")
+
+
+def check_cassette_mode(mode: str | None) -> str | None:
+    if mode is not None and mode not in CASSETTE_MODES:
+        raise ValueError(f"Unknown cassette mode {mode!r}; expected one of {CASSETTE_MODES}.")
+    return mode
+
+
+def _read_strava_cassette(path: str) -> pl.DataFrame:
+    if not os.path.exists(path):
+        return pl.DataFrame(schema=ACTIVITY_SCHEMA)
+    return pl.read_parquet(path)
+
+
+def _write_strava_cassette(df: pl.DataFrame, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _tmp_path = f"{path}.tmp"
+    df.write_parquet(_tmp_path, compression="zstd", compression_level=10)
+    os.replace(_tmp_path, path)
+
+
+def _replayed_activity(record: dict) -> SimpleNamespace:
+    # Shaped like the stravalib fields `activity_to_record` reads.
+    return SimpleNamespace(
+        **{key: value for key, value in record.items() if key not in ("type", "start_date")},
+        sport_type=SimpleNamespace(root=record["type"]),
+        start_date_local=record["start_date"],
+    )
+
+
+class RecordingStravaClient:
+    """
+    Wraps a stravalib `Client`. Every activity `get_activities` yields is
+    also upserted into the athlete's cassette once the listing completes.
+    Every other attribute is passed through to the real client.
+
+    A sync only lists activities newer than the store's watermark, so the
+    already stored activities can be passed as `seed` to make the cassette
+    hold the whole history.
+    """
+
+    def __init__(self, client, athlete_id: int, root: str = CASSETTE_ROOT, seed: pl.DataFrame | None = None):
+        self._client = client
+        self.cassette_path = strava_cassette_path(athlete_id, root)
+        self._seed = seed
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def get_activities(self, after: datetime | None = None, **kwargs):
+        records = []
+        for activity in self._client.get_activities(after=after, **kwargs):
+            records.append(activity_to_record(activity))
+            yield activity
+
+        recorded = _read_strava_cassette(self.cassette_path)
+        if self._seed is not None:
+            recorded = merge_activities(recorded, self._seed.select(ACTIVITY_SCHEMA))
+        fetched = pl.DataFrame(records, schema=ACTIVITY_SCHEMA)
+        _write_strava_cassette(merge_activities(recorded, fetched), self.cassette_path)
+
+
+def read_strava_cassette(athlete_id: int, root: str = CASSETTE_ROOT) -> pl.DataFrame:
+    """An athlete's recorded activities, exactly as recorded."""
+    path = strava_cassette_path(athlete_id, root)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No Strava cassette at {path}; run once with cassettes=record first.")
+    return _read_strava_cassette(path)
+
+
+class ReplayStravaClient:
+    """
+    Serves `get_activities` from a recorded cassette without touching the
+    network or stravalib. The token attributes are None.
+
+    Example
+    --------
+    >>> client = ReplayStravaClient(athlete_id=0)
+    >>> df_activities = fetch_activities(client, after=DEFAULT_SYNC_START)
+    """
+
+    access_token = None
+    token_expires_at = None
+
+    def __init__(self, athlete_id: int, root: str = CASSETTE_ROOT):
+        self.cassette_path = strava_cassette_path(athlete_id, root)
+        if not os.path.exists(self.cassette_path):
+            raise FileNotFoundError(f"No Strava cassette at {self.cassette_path}; run once with cassettes=record first.")
+
+    def get_activities(self, after: datetime | None = None, **kwargs):
+        df = _read_strava_cassette(self.cassette_path)
+        if after is not None:
+            df = df.filter(pl.col("start_date") > after)
+        for record in df.sort("start_date").iter_rows(named=True):
+            yield _replayed_activity(record)
+
+
+def _read_sheets_cassette(path: str) -> dict:
+    with gzip.open(path, "rt") as _f:
+        return json.load(_f)
+
+
+def _write_sheets_cassette(cassette: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _tmp_path = f"{path}.tmp"
+    with gzip.open(_tmp_path, "wt") as _f:
+        json.dump(cassette, _f)
+    os.replace(_tmp_path, path)
+
+
+class _RecordingSpreadsheet:
+    def __init__(self, spreadsheet, path: str):
+        self._spreadsheet = spreadsheet
+        self._path = path
+        self.sheet1 = SimpleNamespace(get_all_records=self._get_all_records)
+
+    def get_lastUpdateTime(self):
+        # The caller skips get_all_records when its own cache is current, so
+        # a missing or stale cassette is filled in here instead.
+        modified_time = self._spreadsheet.get_lastUpdateTime()
+        if not os.path.exists(self._path) or _read_sheets_cassette(self._path)["modified_time"] != modified_time:
+            self._record(modified_time)
+        return modified_time
+
+    def _record(self, modified_time) -> None:
+        records = self._spreadsheet.sheet1.get_all_records()
+        _write_sheets_cassette({"modified_time": modified_time, "records": records}, self._path)
+
+    def _get_all_records(self):
+        return _read_sheets_cassette(self._path)["records"]
+
+
+class RecordingSheetsClient:
+    """
+    Wraps a gspread client so every sheet it opens is saved, with its
+    modified time, to a gzipped JSON cassette whenever the sheet changed.
+    """
+
+    def __init__(self, client, root: str = CASSETTE_ROOT):
+        self._client = client
+        self.root = root
+
+    def open(self, sheet_name: str):
+        return _RecordingSpreadsheet(self._client.open(sheet_name), sheets_cassette_path(sheet_name, self.root))
+
+
+def read_sheets_cassette(sheet_name: str, root: str = CASSETTE_ROOT) -> pl.DataFrame:
+    """A recorded race history sheet, parsed like a live one."""
+    return parse_race_records(_read_sheets_cassette(sheets_cassette_path(sheet_name, root))["records"])
+
+
+class ReplaySheetsClient:
+    """A gspread-like client that serves recorded sheets from their cassettes."""
+
+    def __init__(self, root: str = CASSETTE_ROOT):
+        self.root = root
+
+    def open(self, sheet_name: str):
+        cassette = _read_sheets_cassette(sheets_cassette_path(sheet_name, self.root))
+        return SimpleNamespace(
+            get_lastUpdateTime=lambda: cassette["modified_time"],
+            sheet1=SimpleNamespace(get_all_records=lambda: cassette["records"]),
+        )
@@ -0,0 +1,75 @@
+"""Pre-aggregated mileage bins for the dashboard's mileage chart."""
+
+from datetime import date
+
+import polars as pl
+
+from running_dashboard.date_index import DateIndex
+from running_dashboard.instrumentation import metrics
+
+# Largest visible span, in days, that each bin size is used for. Anything
+# longer is binned by month.
+BIN_SPANS = {"day": 400, "week": 3 * 365}
+BIN_EVERY = {"day": "1d", "week": "1w", "month": "1mo"}
+
+
+def choose_bin(start: date, end: date) -> str:
+    """The coarsest-needed bin for a visible `start`..`end` span."""
+    span_days = (end - start).days + 1
+    for bin_size, max_days in BIN_SPANS.items():
+        if span_days <= max_days:
+            return bin_size
+    return "month"
+
+
+def mileage_bins(df_runs: pl.DataFrame, bin_size: str) -> pl.DataFrame:
+    """
+    Sum `distance_miles` into `bin_size` bins ("day", "week" or "month").
+
+    Returns (date, distance_miles, runs) rows where "date" is the start of
+    each bin, plus "athlete_id" when `df_runs` has one.
+    """
+    keys = ["athlete_id"] if "athlete_id" in df_runs.columns else []
+    return (
+        df_runs.lazy()
+        .group_by(*keys, pl.col("date").dt.truncate(BIN_EVERY[bin_size]))
+        .agg(pl.col("distance_miles").sum().round(2), pl.len().alias("runs"))
+        .sort(*keys, "date")
+        .collect()
+    )
+
+
+class MileageBinCache:
+    """
+    Mileage bins per (athlete_id, span), built on first use and reused until
+    the cache is rebuilt for new activity data. Each span's runs are a
+    binary-searched slice of a `DateIndex`, not a scan of every run.
+
+    Example
+    --------
+    >>> mileage_cache = MileageBinCache(df_runs)
+    >>> bin_size, bins = mileage_cache.for_year(2025, athlete_id=0)
+    """
+
+    def __init__(self, df_runs: pl.DataFrame):
+        self.index = DateIndex(df_runs)
+        self._bins = {}
+
+    def _runs(self, start: date, end: date, athlete_id) -> pl.DataFrame:
+        runs = self.index.range(start, end, athlete_id=athlete_id)
+        if athlete_id is None or self.index.by is None:
+            return runs
+        return runs.drop("athlete_id")
+
+    def for_span(self, start: date, end: date, athlete_id=None) -> tuple[str, pl.DataFrame]:
+        """The bin size for the span and the bins that fall inside it."""
+        bin_size = choose_bin(start, end)
+        key = (athlete_id, start, end, bin_size)
+        metrics.cache("mileage_bins", hit=key in self._bins)
+        if key not in self._bins:
+            runs = self._runs(start, end, athlete_id)
+            self._bins[key] = mileage_bins(runs, bin_size)
+        return bin_size, self._bins[key]
+
+    def for_year(self, year: int, athlete_id=None) -> tuple[str, pl.DataFrame]:
+        return self.for_span(date(year, 1, 1), date(year, 12, 31), athlete_id=athlete_id)
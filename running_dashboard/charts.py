@@ -0,0 +1,50 @@
+"""Altair charts for the dashboard. Imports altair, so load it lazily."""
+
+import altair as alt
+import polars as pl
+
+# Transformers that ship chart data to the frontend as a file instead of
+# inlining every row as JSON in the spec. marimo registers these once altair
+# is imported inside a notebook. "marimo_arrow" is left out: Vega-Lite's
+# schema only allows csv/tsv/json/topojson data formats, so every chart
+# would fail validation.
+COMPACT_TRANSFORMERS = ["marimo_csv"]
+
+_BIN_TIME_UNITS = {"day": "yearmonthdate", "week": "yearmonthdate", "month": "yearmonth"}
+_BIN_TITLES = {"day": "No. of Miles", "week": "Miles per Week", "month": "Miles per Month"}
+
+
+def enable_compact_transport() -> str:
+    """Switch Altair to the most compact available data transformer and return its name."""
+    for name in COMPACT_TRANSFORMERS:
+        if name in alt.data_transformers.names():
+            alt.data_transformers.enable(name)
+            return name
+    return alt.data_transformers.active
+
+
+def mileage_bar_chart(mileage: pl.DataFrame, bin_size: str = "day") -> alt.Chart:
+    """A bar per (date, distance_miles) row, labelled for the bin size."""
+    x_scale = alt.Scale(nice={'interval': 'day', 'step': 7}) if bin_size == "day" else alt.Undefined
+    return alt.Chart(data=mileage).mark_bar().encode(
+        x=alt.X('date', timeUnit=_BIN_TIME_UNITS[bin_size], title="", scale=x_scale),
+        y=alt.Y('distance_miles', title=_BIN_TITLES[bin_size])
+    )
+
+
+def training_load_chart(training_load: pl.DataFrame) -> alt.Chart:
+    """Daily mileage bars under ATL, CTL and TSB lines from a `TrainingLoad` series."""
+    base = alt.Chart(data=training_load).encode(x=alt.X('date', title=""))
+    bars = base.mark_bar(opacity=0.3).encode(y=alt.Y('distance_miles', title="Miles / Load"))
+    lines = base.transform_fold(
+        ["atl", "ctl", "tsb"], as_=["measure", "value"]
+    ).mark_line().encode(
+        y=alt.Y('value:Q'),
+        color=alt.Color(
+            'measure:N',
+            title="",
+            scale=alt.Scale(domain=["atl", "ctl", "tsb"]),
+            legend=alt.Legend(labelExpr="{'atl': 'Fatigue (ATL)', 'ctl': 'Fitness (CTL)', 'tsb': 'Form (TSB)'}[datum.label]")
+        )
+    )
+    return alt.layer(bars, lines)
@@ -0,0 +1,60 @@
+"""Date-sorted frames sliced by binary search instead of filtered by scan."""
+
+from datetime import date
+
+import polars as pl
+
+
+class DateIndex:
+    """
+    A frame sorted by ("athlete_id", "date"), or by "date" alone when it has
+    no "athlete_id" column.
+
+    Every athlete's rows are then one contiguous block in date order, so a
+    date range is two `search_sorted` calls on the "date" column and the
+    result is a zero-copy `slice` of the sorted frame.
+
+    Example
+    --------
+    >>> runs_index = DateIndex(df_runs)
+    >>> runs_index.range(date(2025, 1, 6), date(2025, 3, 30), athlete_id=0)
+    """
+
+    def __init__(self, df: pl.DataFrame, by: str = "athlete_id"):
+        self.by = by if by in df.columns else None
+        self.df = df.sort(*([self.by] if self.by else []), "date")
+        self._dates = self.df["date"]
+        self._keys = self.df[self.by] if self.by else None
+
+    def _block(self, athlete_id) -> tuple[int, int]:
+        if self._keys is None or athlete_id is None:
+            return 0, len(self.df)
+        return (
+            self._keys.search_sorted(athlete_id, side="left"),
+            self._keys.search_sorted(athlete_id, side="right"),
+        )
+
+    def range(self, start: date | None = None, end: date | None = None, athlete_id=None) -> pl.DataFrame:
+        """
+        Rows from `start` to `end` inclusive (either may be None for an open
+        end), for one athlete when `athlete_id` is given.
+        """
+        if self._keys is not None and athlete_id is None:
+            # Athletes' blocks overlap in time, so a cross-athlete range isn't contiguous.
+            return self.df.filter(pl.col("date").is_between(start or date.min, end or date.max))
+
+        lo, hi = self._block(athlete_id)
+        dates = self._dates.slice(lo, hi - lo)
+        first = lo + (dates.search_sorted(start, side="left") if start is not None else 0)
+        last = lo + (dates.search_sorted(end, side="right") if end is not None else hi - lo)
+        return self.df.slice(first, last - first)
+
+    def year(self, year: int, athlete_id=None) -> pl.DataFrame:
+        return self.range(date(year, 1, 1), date(year, 12, 31), athlete_id=athlete_id)
+
+    def bounds(self, athlete_id=None) -> tuple[date | None, date | None]:
+        """The first and last date stored, for one athlete when given."""
+        lo, hi = self._block(athlete_id)
+        if hi <= lo:
+            return None, None
+        return self._dates[lo], self._dates[hi - 1]
@@ -0,0 +1,41 @@
+"""Native Polars expressions for rendering durations and paces."""
+
+import polars as pl
+
+
+def _two_digits(expr: pl.Expr) -> pl.Expr:
+    return expr.cast(pl.String).str.zfill(2)
+
+
+def format_duration(expr: pl.Expr) -> pl.Expr:
+    """
+    Render a number of seconds as an "H:MM:SS" string.
+
+    Matches `str(timedelta(seconds=n))` for values under a day, without
+    dropping into Python once per row.
+
+    Example
+    --------
+    >>> pl.DataFrame({"secs": [59, 3723]}).select(format_duration(pl.col("secs")))
+    ["0:00:59", "1:02:03"]
+    """
+    secs = expr.round(0).cast(pl.Int64)
+    return pl.format(
+        "{}:{}:{}",
+        secs // 3600,
+        _two_digits((secs % 3600) // 60),
+        _two_digits(secs % 60),
+    )
+
+
+def format_pace(expr: pl.Expr) -> pl.Expr:
+    """
+    Render a number of seconds per mile as an "M:SS" string.
+
+    Example
+    --------
+    >>> pl.DataFrame({"secs_per_mile": [485.4]}).select(format_pace(pl.col("secs_per_mile")))
+    ["8:05"]
+    """
+    secs = expr.round(0).cast(pl.Int64)
+    return pl.format("{}:{}", secs // 60, _two_digits(secs % 60))
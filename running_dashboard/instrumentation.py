@@ -0,0 +1,122 @@
+"""Stage timings, HTTP call counts and cache hit ratios for the dashboard."""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = "data/metrics"
+METRICS_LOG_PATH = os.path.join(METRICS_DIR, "events.jsonl")
+METRICS_PROM_PATH = os.path.join(METRICS_DIR, "dashboard.prom")
+
+_HELP = {
+    "dashboard_stage_seconds": ("gauge", "Wall time of the last run of each dashboard stage."),
+    "dashboard_stage_runs_total": ("counter", "Number of times each dashboard stage has run."),
+    "dashboard_http_requests_total": ("counter", "HTTP requests made, by service and status."),
+    "dashboard_http_response_bytes_total": ("counter", "Response body bytes received, by service."),
+    "dashboard_cache_requests_total": ("counter", "Cache lookups, by cache and result (hit or miss)."),
+}
+
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    """
+    A thread-safe, in-process registry of dashboard measurements.
+
+    Stage timings are appended to a JSON-lines log as they finish. `flush`
+    appends a line with every counter and rewrites a Prometheus text-format
+    file, so a node_exporter textfile collector can scrape it.
+
+    Example
+    --------
+    >>> with metrics.stage("strava_import"):
+    ...     df_activities_import = sync_team(clients)
+    >>> metrics.cache("mileage_bins", hit=True)
+    >>> metrics.flush()
+    """
+
+    def __init__(self, log_path: str = METRICS_LOG_PATH, prom_path: str = METRICS_PROM_PATH, clock=time.perf_counter):
+        self.log_path = log_path
+        self.prom_path = prom_path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _log(self, event: dict) -> None:
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with self._lock, open(self.log_path, "a") as _f:
+            _f.write(json.dumps({"ts": time.time(), **event}) + "\n")
+
+    def _add(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def _set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._values[(name, tuple(sorted(labels.items())))] = value
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as one run of stage `name`."""
+        start = self._clock()
+        try:
+            yield
+        finally:
+            secs = self._clock() - start
+            self._set("dashboard_stage_seconds", secs, stage=name)
+            self._add("dashboard_stage_runs_total", 1, stage=name)
+            self._log({"event": "stage", "stage": name, "secs": round(secs, 6)})
+
+    def http(self, service: str, status: int, response_bytes: int) -> None:
+        self._add("dashboard_http_requests_total", 1, service=service, status=status)
+        self._add("dashboard_http_response_bytes_total", response_bytes, service=service)
+
+    def cache(self, name: str, hit: bool, count: int = 1) -> None:
+        self._add("dashboard_cache_requests_total", count, cache=name, result="hit" if hit else "miss")
+
+    def instrument_session(self, session, service: str):
+        """Count every response `session` (a requests.Session) receives under `service`."""
+        def _on_response(response, *args, **kwargs):
+            size = response.headers.get("Content-Length")
+            self.http(service, response.status_code, int(size) if size is not None else len(response.content))
+
+        session.hooks["response"].append(_on_response)
+        return session
+
+    def values(self) -> list[dict]:
+        """Every measurement as a (metric, labels..., value) record."""
+        with self._lock:
+            items = list(self._values.items())
+        return [{"metric": name, **dict(labels), "value": value} for (name, labels), value in sorted(items, key=str)]
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            items = sorted(self._values.items(), key=str)
+        for metric, (kind, help_text) in _HELP.items():
+            samples = [(labels, value) for (name, labels), value in items if name == metric]
+            if not samples:
+                continue
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f"{metric}{_label_text(labels)} {value}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        """Log every counter and atomically rewrite the Prometheus file."""
+        self._log({"event": "counters", "values": self.values()})
+        os.makedirs(os.path.dirname(self.prom_path) or ".", exist_ok=True)
+        _tmp_path = f"{self.prom_path}.tmp"
+        with open(_tmp_path, "w") as _f:
+            _f.write(self.to_prometheus())
+        os.replace(_tmp_path, self.prom_path)
+
+
+# Shared by every module and the notebook, so one panel sees all of them.
+metrics = Metrics()
@@ -0,0 +1,127 @@
+"""Grouped metric engine behind the dashboard's yearly stat row."""
+
+import polars as pl
+
+from running_dashboard.formatting import format_pace
+
+FIRST_YEAR = 2022
+
+# Each source frame is aggregated once per group. Adding a metric means adding
+# an expression here, not another pass over the data.
+RUN_METRICS = {
+    "distance_miles": pl.col("distance_miles").sum(),
+    "avg_run_pace_secs": pl.col("secs_per_mile").mean().round(0),
+}
+
+RACE_METRICS = {
+    "no_of_races": pl.col("official_time").is_not_null().sum(),
+    "race_miles": pl.col("miles").filter(pl.col("official_time").is_not_null()).sum(),
+    "avg_race_pace_secs": (
+        pl.col("official_pace_in_seconds")
+        .filter(pl.col("official_time_in_seconds").is_not_null())
+        .mean()
+        .round(0)
+    ),
+}
+
+# Metrics that should read as zero, not missing, for a year with no activity.
+ZERO_FILLED_METRICS = ["distance_miles", "no_of_races", "race_miles"]
+
+
+def _grouped(df: pl.DataFrame | pl.LazyFrame, metrics: dict, by: list[str]) -> pl.LazyFrame:
+    return (
+        df.lazy()
+        .with_columns(pl.col("date").dt.year().alias("year"))
+        .group_by(by)
+        .agg(**metrics)
+    )
+
+
+def yearly_metrics_table(
+    df_runs: pl.DataFrame,
+    race_results: pl.DataFrame,
+    first_year: int = FIRST_YEAR,
+    last_year: int | None = None,
+) -> pl.DataFrame:
+    """
+    Parameters
+    ----------
+    df_runs : polars DataFrame
+        The transformed runs with "date", "distance_miles" and "secs_per_mile".
+
+    race_results : polars DataFrame
+        The race history with "date", "miles", "official_time",
+        "official_time_in_seconds" and "official_pace_in_seconds".
+
+    first_year, last_year : int
+        Inclusive range of years to report. `last_year` defaults to the
+        latest year in either frame.
+
+    Returns
+    -------
+    polars DataFrame
+        One row per year with a column per metric in `RUN_METRICS` and
+        `RACE_METRICS`.
+
+    Notes
+    -----
+    When `df_runs` has an "athlete_id" column the table has one row per
+    (athlete_id, year) instead, still from a single `group_by` per frame.
+    `race_results` then needs an "athlete_id" column too.
+
+    Example
+    --------
+    >>> yearly_metrics_table(df_runs, official_race_results_df).columns
+    ['year', 'distance_miles', 'avg_run_pace_secs', 'no_of_races', 'race_miles', 'avg_race_pace_secs']
+    """
+    if last_year is None:
+        last_year = max(
+            year
+            for year in (
+                df_runs.select(pl.col("date").dt.year().max()).item(),
+                race_results.select(pl.col("date").dt.year().max()).item(),
+                first_year,
+            )
+            if year is not None
+        )
+
+    keys = ["athlete_id", "year"] if "athlete_id" in df_runs.columns else ["year"]
+
+    grid = pl.LazyFrame({"year": pl.int_range(first_year, last_year + 1, eager=True).cast(pl.Int32)})
+    if "athlete_id" in keys:
+        athletes = pl.concat([df_runs.select("athlete_id"), race_results.select("athlete_id")]).unique()
+        grid = athletes.lazy().join(grid, how="cross")
+
+    return (
+        grid
+        .join(_grouped(df_runs, RUN_METRICS, keys), on=keys, how="left")
+        .join(_grouped(race_results, RACE_METRICS, keys), on=keys, how="left")
+        .with_columns(pl.col(ZERO_FILLED_METRICS).fill_null(0))
+        .sort(keys)
+        .collect()
+    )
+
+
+def range_metrics(df_runs: pl.DataFrame, race_results: pl.DataFrame) -> pl.DataFrame:
+    """
+    The `RUN_METRICS` and `RACE_METRICS` of frames already cut to a date
+    range (e.g. by `DateIndex.range`), as one row with the same columns as
+    a `yearly_metrics_table` row, minus the keys.
+
+    Example
+    --------
+    >>> range_metrics(runs_index.range(start, end, athlete_id=0), races_index.range(start, end, athlete_id=0))
+    """
+    return (
+        pl.concat([df_runs.lazy().select(**RUN_METRICS), race_results.lazy().select(**RACE_METRICS)], how="horizontal")
+        .with_columns(pl.col(ZERO_FILLED_METRICS).fill_null(0))
+        .collect()
+    )
+
+
+def format_yearly_metrics(df: pl.DataFrame) -> pl.DataFrame:
+    """Add the "M:SS" pace strings the stat row displays."""
+    return df.with_columns(
+        format_pace(pl.col("avg_run_pace_secs")).fill_null("-").alias("avg_run_pace_mins_per_mile"),
+        format_pace(pl.col("avg_race_pace_secs")).fill_null("-").alias("avg_race_pace_mins_per_mile")
+    )
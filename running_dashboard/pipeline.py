@@ -0,0 +1,232 @@
+"""Headless ingestion: everything the dashboard loads, without the notebook."""
+
+import os
+
+import polars as pl
+
+from running_dashboard.activity_store import (
+    ACTIVITY_SCHEMA,
+    load_athlete_activities,
+    load_team_activities,
+    split_activities,
+    sync_team,
+)
+from running_dashboard.athletes import DEFAULT_ATHLETE, Athlete, load_athletes
+from running_dashboard.cassettes import (
+    RecordingSheetsClient,
+    RecordingStravaClient,
+    ReplaySheetsClient,
+    ReplayStravaClient,
+    check_cassette_mode,
+    read_sheets_cassette,
+    read_strava_cassette,
+)
+from running_dashboard.instrumentation import metrics
+from running_dashboard.race_history import (
+    RACE_HISTORY_SCHEMA,
+    load_race_history,
+    migrate_legacy_cache,
+    read_cached_race_history,
+)
+from running_dashboard.strava_auth import StravaTokenManager, read_client_credentials, stravalib_refresher
+from running_dashboard.transforms import transform_runs
+
+SERVICE_ACCOUNT_PATH = "./service_account.json"
+RACE_HISTORY_CACHE_DIR = "data/race_history"
+
+
+def strava_client(
+    token_path: str = "strava_token.json",
+    client_path: str = "strava_client.txt",
+    background_refresh: bool = False,
+):
+    """
+    An authenticated stravalib `Client` backed by the shared token file.
+    With `background_refresh`, the token keeps being refreshed ahead of
+    expiry for as long as the process runs.
+    """
+    from stravalib import Client
+
+    client = Client()
+    metrics.instrument_session(client.protocol.rsession, "strava")
+    manager = StravaTokenManager(
+        refresh=stravalib_refresher(*read_client_credentials(client_path)),
+        token_path=token_path
+    )
+    manager.apply_to(client)
+    if background_refresh:
+        manager.start_background_refresh(client)
+    return client
+
+
+def strava_clients(
+    athletes: list[Athlete],
+    client_path: str = "strava_client.txt",
+    background_refresh: bool = False,
+    cassette_mode: str | None = None,
+) -> dict:
+    """
+    One authenticated client per athlete, keyed by athlete_id. With
+    `cassette_mode` "record" the clients also save what they list to local
+    cassettes; with "replay" they serve those cassettes and need no network,
+    stravalib or tokens. To replay without writing to the local stores use
+    `replay_dashboard_frames` instead of syncing with these.
+    """
+    if check_cassette_mode(cassette_mode) == "replay":
+        return {athlete.athlete_id: ReplayStravaClient(athlete.athlete_id) for athlete in athletes}
+
+    clients = {
+        athlete.athlete_id: strava_client(athlete.token_path, client_path, background_refresh=background_refresh)
+        for athlete in athletes
+    }
+    if cassette_mode == "record":
+        clients = {
+            athlete_id: RecordingStravaClient(client, athlete_id, seed=load_athlete_activities(athlete_id))
+            for athlete_id, client in clients.items()
+        }
+    return clients
+
+
+def sheets_client_factory(
+    service_account_path: str = SERVICE_ACCOUNT_PATH,
+    timeout: float = 10,
+    cassette_mode: str | None = None,
+):
+    """A `client_factory` for `load_race_history`, optionally recording or replaying cassettes."""
+    if check_cassette_mode(cassette_mode) == "replay":
+        return ReplaySheetsClient
+
+    def _open_sheets_client():
+        import gspread
+
+        _gc = gspread.service_account(service_account_path)
+        _gc.set_timeout(timeout)
+        metrics.instrument_session(_gc.http_client.session, "sheets")
+        return RecordingSheetsClient(_gc) if cassette_mode == "record" else _gc
+
+    return _open_sheets_client
+
+
+def load_runs(clients: dict | None = None, lookback_days: int = 7) -> pl.DataFrame:
+    """`df_runs` for every athlete, synced first unless `clients` is None."""
+    df_activities = load_team_activities() if clients is None else sync_team(clients, lookback_days=lookback_days)
+    df_runs_import, _ = split_activities(df_activities)
+    return transform_runs(df_runs_import)
+
+
+def race_history_cache_path(athlete: Athlete) -> str:
+    path = os.path.join(RACE_HISTORY_CACHE_DIR, f"{athlete.athlete_id}.parquet")
+    if athlete.athlete_id == DEFAULT_ATHLETE.athlete_id:
+        # The pre-team cache belonged to the token-file athlete.
+        migrate_legacy_cache(path)
+    return path
+
+
+def load_race_results(athletes: list[Athlete], client_factory=None) -> pl.DataFrame:
+    """
+    Every athlete's race history sheet with an "athlete_id" column, or the
+    cached copies if `client_factory` is None. Athletes without a
+    `race_history_sheet` are skipped, so with none at all this is an empty
+    frame of `RACE_HISTORY_SCHEMA`.
+    """
+    frames = []
+    for athlete in athletes:
+        if athlete.race_history_sheet is None:
+            continue
+        if client_factory is None:
+            df, _ = read_cached_race_history(race_history_cache_path(athlete))
+            if df is None:
+                raise FileNotFoundError(f"No cached race history for {athlete.name}; run once online first.")
+        else:
+            df = load_race_history(client_factory, athlete.race_history_sheet, race_history_cache_path(athlete))
+        frames.append(df.with_columns(pl.lit(athlete.athlete_id, dtype=pl.Int64).alias("athlete_id")))
+    return _team_race_results(frames)
+
+
+def _team_race_results(frames: list[pl.DataFrame]) -> pl.DataFrame:
+    if not frames:
+        return pl.DataFrame(schema={**RACE_HISTORY_SCHEMA, "athlete_id": pl.Int64})
+    return pl.concat(frames, how="diagonal_relaxed")
+
+
+def sync_dashboard_frames(
+    clients: dict,
+    athletes: list[Athlete],
+    client_factory,
+    lookback_days: int = 7,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    One sync of every athlete's activities and race history, as run by
+    `BackgroundSync`. Returns (activities, race_results), with activities
+    not yet split by sport.
+    """
+    with metrics.stage("strava_import"):
+        activities = sync_team(clients, lookback_days=lookback_days)
+    with metrics.stage("race_history_via_google_sheets"):
+        race_results = load_race_results(athletes, client_factory)
+    return activities, race_results
+
+
+def replay_dashboard_frames(athletes: list[Athlete]) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    (activities, race_results) read straight from every athlete's
+    cassettes. Nothing is merged with or written to the local stores, so
+    every replay sees exactly the recorded data.
+    """
+    activities = pl.concat([
+        read_strava_cassette(athlete.athlete_id)
+        .select(pl.lit(athlete.athlete_id, dtype=pl.Int64).alias("athlete_id"), *ACTIVITY_SCHEMA)
+        for athlete in athletes
+    ]).sort("athlete_id", "start_date")
+    race_results = _team_race_results([
+        read_sheets_cassette(athlete.race_history_sheet)
+        .with_columns(pl.lit(athlete.athlete_id, dtype=pl.Int64).alias("athlete_id"))
+        for athlete in athletes
+        if athlete.race_history_sheet is not None
+    ])
+    return activities, race_results
+
+
+def stored_dashboard_frames(athletes: list[Athlete]) -> tuple[pl.DataFrame, pl.DataFrame] | None:
+    """
+    The activities and race history left on disk by the last sync, or None
+    before the first one.
+    """
+    activities = load_team_activities()
+    if activities.is_empty():
+        return None
+    try:
+        return activities, load_race_results(athletes)
+    except FileNotFoundError:
+        return None
+
+
+def official_results(race_results: pl.DataFrame) -> pl.DataFrame:
+    """Races that have been run, as opposed to the upcoming schedule."""
+    return race_results.filter(pl.col("official_time_in_seconds").is_not_null())
+
+
+def load_dashboard_frames(
+    offline: bool = False,
+    athletes: list[Athlete] | None = None,
+    cassette_mode: str | None = None,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Returns
+    -------
+    tuple of polars DataFrame
+        (df_runs, race_results) for every athlete, synced from Strava and
+        Google Sheets (recording cassettes with `cassette_mode` "record"),
+        read from the local stores when `offline`, or read from the
+        cassettes alone with `cassette_mode` "replay".
+    """
+    athletes = athletes or load_athletes()
+    if offline:
+        return load_runs(), load_race_results(athletes)
+    if check_cassette_mode(cassette_mode) == "replay":
+        activities, race_results = replay_dashboard_frames(athletes)
+        return transform_runs(split_activities(activities)[0]), race_results
+    return (
+        load_runs(strava_clients(athletes, cassette_mode=cassette_mode)),
+        load_race_results(athletes, sheets_client_factory(cassette_mode=cassette_mode)),
+    )
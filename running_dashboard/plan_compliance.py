@@ -0,0 +1,205 @@
+"""Training plan days parsed into planned workouts and matched against actual runs."""
+
+import os
+from datetime import date
+
+import polars as pl
+
+PLANS_DIR = "data/plans"
+METERS_PER_MILE = 1609.344
+MILES_PER_KM = 0.621371
+
+# Checked in order against the lowercased "training" text; the first match
+# wins, so "5 x 400 5K pace" is intervals, not pace, and "Rest or run" is rest.
+WORKOUT_PATTERNS = {
+    "race": r"\brace\b|^(half\s+)?marathon$",
+    "rest": r"^(rest|off)\b",
+    "intervals": r"\d+\s*x\s*\d+",
+    "tempo": r"\btempo\b",
+    "hills": r"\bhills?\b",
+    "pace": r"\bpace\b",
+    "cross": r"\bcross\b|\bswim|\bbik(e|ing)\b|\bcycl|\bwalk",
+    "run": r"\brun\b|\beasy\b|\blong\b|\d\s*(miles?|mi|m)\b",
+}
+RUN_WORKOUTS = ["race", "intervals", "tempo", "hills", "pace", "run"]
+
+# "4 m run (3 m pace)" describes part of the 4 miles, so bracketed
+# sub-segments add no distance.
+_SUB_SEGMENTS = r"\([^)]*\)"
+_INTERVALS = r"\d+\s*x\s*\d+(\.\d+)?\s*(meters?\b|miles?\b|mi\b|m\b)?"
+# "5K pace" and "marathon pace" name a pace, not a distance to cover.
+_PACE_REFERENCES = r"\d+(\.\d+)?\s*-?\s*k\s+pace|(half\s+)?marathon\s+pace"
+_MILES = r"\d+(\.\d+)?\s*(miles?|mi|m)\b"
+_KMS = r"\d+(\.\d+)?\s*-?\s*(km|k)\b"
+_MINUTES = r"(\d+)\s*(-\s*\d+\s*)?min"
+_NUMBER = r"(\d+(\.\d+)?)"
+
+
+def _summed_numbers(matches: pl.Expr) -> pl.Expr:
+    # The leading number of every match in each row's list, summed.
+    return matches.list.eval(pl.element().str.extract(_NUMBER, 1).cast(pl.Float64)).list.sum()
+
+
+def parse_plan(plan: pl.DataFrame) -> pl.DataFrame:
+    """
+    Add "workout", "planned_miles" and "planned_minutes" parsed from each
+    day's free-text "training" cell, e.g. "3 m run", "Rest", "30 min cross"
+    or "5 x 400 5K pace".
+
+    Notes
+    -----
+    The column is parsed with Polars string expressions, so there is no
+    Python per row, and only its distinct values are parsed: a plan repeats
+    "Rest" and "3 m run" every week. Interval reps of 100 or more are read as meters,
+    smaller ones as miles. Only top-level distances are summed, so the
+    bracketed sub-segment in "4 m run (3 m pace)" plans no extra miles. Rest
+    and cross days plan 0 miles; a run given only in minutes has null
+    "planned_miles".
+
+    Example
+    --------
+    >>> parse_plan(generate_training_plan("5K", "Novice", date(2025, 5, 4)))
+    """
+    text = pl.col("_training").str.to_lowercase().str.replace_all(r"\s+", " ").str.strip_chars()
+
+    workout = pl.lit("other")
+    for name, pattern in reversed(WORKOUT_PATTERNS.items()):
+        workout = pl.when(text.str.contains(pattern)).then(pl.lit(name)).otherwise(workout)
+
+    top_level = text.str.replace_all(_SUB_SEGMENTS, " ")
+    reps = pl.element().str.extract(r"^(\d+)", 1).cast(pl.Float64)
+    size = pl.element().str.extract(r"x\s*" + _NUMBER, 1).cast(pl.Float64)
+    intervals = top_level.str.extract_all(_INTERVALS).list.eval(
+        reps * pl.when(size >= 100).then(size / METERS_PER_MILE).otherwise(size)
+    ).list.sum()
+
+    distance_text = top_level.str.replace_all(_INTERVALS, " ").str.replace_all(_PACE_REFERENCES, " ")
+    named_race = (
+        pl.when(distance_text.str.contains(r"\bhalf marathon\b")).then(13.1)
+        .when(distance_text.str.contains(r"\bmarathon\b")).then(26.2)
+        .otherwise(0.0)
+    )
+    miles = (
+        intervals
+        + _summed_numbers(distance_text.str.extract_all(_MILES))
+        + _summed_numbers(distance_text.str.extract_all(_KMS)) * MILES_PER_KM
+        + named_race
+    )
+
+    parsed = (
+        plan.lazy()
+        .select(pl.col("training").fill_null("").unique().alias("_training"))
+        .with_columns(
+            workout.alias("workout"),
+            miles.alias("planned_miles"),
+            text.str.extract(_MINUTES, 1).cast(pl.Int32).alias("planned_minutes"),
+        )
+        .with_columns(
+            pl.when(pl.col("workout").is_in(RUN_WORKOUTS))
+            .then(pl.when(pl.col("planned_miles") > 0).then(pl.col("planned_miles")))
+            .when(pl.col("workout").is_in(["rest", "cross"]))
+            .then(0.0)
+            .otherwise(pl.col("planned_miles").fill_null(0.0))
+            .alias("planned_miles")
+        )
+    )
+    return (
+        plan.lazy()
+        .with_columns(pl.col("training").fill_null("").alias("_training"))
+        .join(parsed, on="_training", how="left", maintain_order="left")
+        .drop("_training")
+        .collect()
+    )
+
+
+def weekly_compliance(plan: pl.DataFrame, df_runs: pl.DataFrame, as_of: date | None = None) -> pl.DataFrame:
+    """
+    Parameters
+    ----------
+    plan : polars DataFrame
+        Plan days with "date", "week" and "training", as from
+        `generate_training_plans`, parsed or not.
+
+    df_runs : polars DataFrame
+        The transformed runs with "date" and "distance_miles".
+
+    as_of : date
+        Plan days after this are left out. Defaults to today, so the
+        current week compares the plan so far with the runs so far.
+
+    Returns
+    -------
+    polars DataFrame
+        One row per plan week with "week_start", "planned_miles",
+        "actual_miles", "planned_runs", "completed_runs" (planned run days
+        with a run), "unplanned_runs" (rest or cross days with a run),
+        "mileage_compliance" and "run_compliance". The ratios are null for
+        a week with nothing planned.
+
+    Notes
+    -----
+    When both frames have an "athlete_id" column the plan is matched per
+    athlete, with one row per (athlete_id, week). The runs are reduced to
+    one row per day before the join, so the cost is one `group_by` per
+    frame however long the history is.
+
+    Example
+    --------
+    >>> weekly_compliance(read_active_plan(athlete_id), df_runs.filter(pl.col("athlete_id") == athlete_id))
+    """
+    keys = ["athlete_id"] if "athlete_id" in plan.columns and "athlete_id" in df_runs.columns else []
+    plan_days = plan if "workout" in plan.columns else parse_plan(plan)
+
+    actual = (
+        df_runs.lazy()
+        .group_by(*keys, "date")
+        .agg(pl.col("distance_miles").sum().alias("actual_miles"), pl.len().alias("actual_runs"))
+    )
+    ran = pl.col("actual_runs") > 0
+    planned_run = pl.col("workout").is_in(RUN_WORKOUTS)
+
+    return (
+        plan_days.lazy()
+        .filter(pl.col("date") <= (as_of or date.today()))
+        .join(actual, on=[*keys, "date"], how="left")
+        .with_columns(pl.col("actual_miles", "actual_runs").fill_null(0))
+        .group_by(*keys, "week")
+        .agg(
+            pl.col("date").min().alias("week_start"),
+            pl.col("planned_miles").sum(),
+            pl.col("actual_miles").sum(),
+            planned_run.sum().alias("planned_runs"),
+            (planned_run & ran).sum().alias("completed_runs"),
+            (~planned_run & ran).sum().alias("unplanned_runs"),
+        )
+        .with_columns(
+            pl.when(pl.col("planned_miles") > 0)
+            .then(pl.col("actual_miles") / pl.col("planned_miles"))
+            .alias("mileage_compliance"),
+            pl.when(pl.col("planned_runs") > 0)
+            .then(pl.col("completed_runs") / pl.col("planned_runs"))
+            .alias("run_compliance"),
+        )
+        .sort(*keys, "week")
+        .collect()
+    )
+
+
+def active_plan_path(athlete_id: int, root: str = PLANS_DIR) -> str:
+    return os.path.join(root, f"{athlete_id}.parquet")
+
+
+def save_active_plan(plan: pl.DataFrame, athlete_id: int, root: str = PLANS_DIR) -> None:
+    """Make `plan` the one the dashboard tracks for `athlete_id`."""
+    path = active_plan_path(athlete_id, root)
+    os.makedirs(root, exist_ok=True)
+    plan.select("date", "week", "day_of_week", "training").write_parquet(f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+
+
+def read_active_plan(athlete_id: int, root: str = PLANS_DIR) -> pl.DataFrame | None:
+    """The plan saved for `athlete_id`, or None if there isn't one."""
+    path = active_plan_path(athlete_id, root)
+    if not os.path.exists(path):
+        return None
+    return pl.read_parquet(path)
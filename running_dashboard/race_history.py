@@ -0,0 +1,117 @@
+"""Race history from Google Sheets, cached locally until the sheet changes."""
+
+import json
+import logging
+import os
+
+import polars as pl
+
+from running_dashboard.instrumentation import metrics
+
+# The single cache used before race history was kept per athlete.
+LEGACY_RACE_HISTORY_CACHE_PATH = "data/race_history.parquet"
+# The parsed columns the dashboard reads; a sheet may carry more.
+RACE_HISTORY_SCHEMA = {
+    "date": pl.Date,
+    "miles": pl.Float64,
+    "official_time_in_seconds": pl.Int32,
+    "official_pace_in_seconds": pl.Int32,
+    "official_time": pl.String,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def parse_race_records(records: list[dict]) -> pl.DataFrame:
+    """Turn the sheet's `get_all_records()` rows into a typed frame."""
+    return (
+        pl.DataFrame(records)
+        .with_columns(
+            pl.col("date").str.to_date(),
+            pl.col("official_time_in_seconds", "official_pace_in_seconds").cast(pl.Int32, strict=False)
+        )
+    )
+
+
+def _meta_path(cache_path: str) -> str:
+    return f"{os.path.splitext(cache_path)[0]}.json"
+
+
+def migrate_legacy_cache(cache_path: str, legacy_path: str = LEGACY_RACE_HISTORY_CACHE_PATH) -> bool:
+    """Move the old single cache to `cache_path` if nothing is cached there yet."""
+    if not (os.path.exists(legacy_path) and os.path.exists(_meta_path(legacy_path))):
+        return False
+    if os.path.exists(cache_path):
+        return False
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    os.replace(_meta_path(legacy_path), _meta_path(cache_path))
+    os.replace(legacy_path, cache_path)
+    return True
+
+
+def read_cached_race_history(cache_path: str) -> tuple[pl.DataFrame | None, str | None]:
+    """Return the cached (frame, modified_time), or (None, None) if uncached."""
+    if not (os.path.exists(cache_path) and os.path.exists(_meta_path(cache_path))):
+        return None, None
+    with open(_meta_path(cache_path), "r") as _f:
+        modified_time = json.load(_f)["modified_time"]
+    return pl.read_parquet(cache_path), modified_time
+
+
+def write_cached_race_history(df: pl.DataFrame, modified_time: str, cache_path: str) -> None:
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    df.write_parquet(f"{cache_path}.tmp")
+    os.replace(f"{cache_path}.tmp", cache_path)
+    with open(f"{_meta_path(cache_path)}.tmp", "w") as _f:
+        json.dump({"modified_time": modified_time}, _f)
+    os.replace(f"{_meta_path(cache_path)}.tmp", _meta_path(cache_path))
+
+
+def load_race_history(
+    client_factory,
+    sheet_name: str,
+    cache_path: str,
+) -> pl.DataFrame:
+    """
+    Parameters
+    ----------
+    client_factory : callable
+        Returns a gspread-like client: `.open(name)` gives a spreadsheet with
+        `get_lastUpdateTime()` and `sheet1.get_all_records()`. Pass a fake
+        to run offline.
+
+    sheet_name : str
+        Title of the spreadsheet to open.
+
+    cache_path : str
+        Location of the cached, parsed race history.
+
+    Returns
+    -------
+    polars DataFrame
+        The parsed race history. The sheet is only re-downloaded when its
+        modified time differs from the cached copy's, and the cached copy is
+        returned if Sheets cannot be reached.
+
+    Example
+    --------
+    >>> load_race_history(lambda: gspread.service_account("./service_account.json"), "Race History", "data/race_history/0.parquet")
+    """
+    cached_df, cached_modified_time = read_cached_race_history(cache_path)
+
+    try:
+        spreadsheet = client_factory().open(sheet_name)
+        modified_time = spreadsheet.get_lastUpdateTime()
+        unchanged = cached_df is not None and modified_time == cached_modified_time
+        metrics.cache("race_history", hit=unchanged)
+        if unchanged:
+            return cached_df
+        df = parse_race_records(spreadsheet.sheet1.get_all_records())
+    except Exception:
+        if cached_df is None:
+            raise
+        logger.warning("Could not reach Google Sheets; using the cached race history from %s.", cached_modified_time)
+        return cached_df
+
+    write_cached_race_history(df, modified_time, cache_path)
+    return df
@@ -0,0 +1,88 @@
+"""Server-side filtered, sorted and paginated runs table."""
+
+import math
+
+import polars as pl
+
+from running_dashboard.formatting import format_duration, format_pace
+
+# Displayed column to the raw column it is sorted on.
+SORT_COLUMNS = {
+    "date": "date",
+    "time": "time_in_secs",
+    "distance_miles": "distance_miles",
+    "pace": "secs_per_mile",
+}
+PAGE_SIZES = [10, 25, 50, 100]
+
+
+class RunsTablePager:
+    """
+    The non-race runs behind the runs table, kept as raw numbers in Polars.
+
+    Filtering and sorting run on the numeric columns (so "10:02:00" sorts
+    after "9:58:00") and only the requested page is sliced out and formatted,
+    so building a page costs the same however long the history is. The last
+    filtered and sorted frame is kept, so paging through it is only a slice.
+
+    Example
+    --------
+    >>> pager = RunsTablePager(df_runs.filter(pl.col("date").dt.year() == 2025))
+    >>> rows, total = pager.page(1, page_size=25, sort_by="pace", descending=False, min_miles=5)
+    """
+
+    def __init__(self, df_runs: pl.DataFrame):
+        self._runs = (
+            df_runs
+            .filter(pl.col("is_race") == False)
+            .select("date", "time_in_secs", "distance_miles", "secs_per_mile")
+        )
+        self._last_query = None
+        self._last_result = None
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def query(
+        self,
+        sort_by: str = "date",
+        descending: bool = True,
+        min_miles: float | None = None,
+        max_miles: float | None = None,
+    ) -> pl.DataFrame:
+        """Every matching run, sorted, still unformatted."""
+        key = (sort_by, descending, min_miles, max_miles)
+        if key != self._last_query:
+            lf = self._runs.lazy()
+            if min_miles:
+                lf = lf.filter(pl.col("distance_miles") >= min_miles)
+            if max_miles:
+                lf = lf.filter(pl.col("distance_miles") <= max_miles)
+            self._last_result = lf.sort(SORT_COLUMNS[sort_by], descending=descending, nulls_last=True).collect()
+            self._last_query = key
+        return self._last_result
+
+    def page(self, page: int, page_size: int = 25, **query) -> tuple[pl.DataFrame, int]:
+        """
+        Returns
+        -------
+        tuple
+            The formatted rows of 1-based `page` and the number of matching
+            runs. Keyword arguments are passed on to `query`.
+        """
+        matching = self.query(**query)
+        rows = (
+            matching
+            .slice((page - 1) * page_size, page_size)
+            .with_columns(
+                format_duration(pl.col("time_in_secs")),
+                format_pace(pl.col("secs_per_mile"))
+            )
+            .rename({"time_in_secs": "time", "secs_per_mile": "pace"})
+            .select("date", "time", "distance_miles", "pace")
+        )
+        return rows, len(matching)
+
+
+def page_count(total_rows: int, page_size: int) -> int:
+    return max(1, math.ceil(total_rows / page_size))
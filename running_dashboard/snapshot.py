@@ -0,0 +1,117 @@
+"""Versioned, precomputed dashboard snapshots that open without any network."""
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+import polars as pl
+
+from running_dashboard.chart_data import mileage_bins
+from running_dashboard.metrics import format_yearly_metrics, yearly_metrics_table
+
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_ROOT = "data/snapshots"
+LATEST_POINTER = "LATEST"
+
+_FRAMES = ["runs", "race_results", "yearly_metrics", "mileage"]
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Everything the dashboard renders, already computed."""
+
+    created_at: str
+    runs: pl.DataFrame
+    race_results: pl.DataFrame
+    yearly_metrics: pl.DataFrame
+    mileage: pl.DataFrame
+
+    def _slice(self, df: pl.DataFrame, year: int, athlete_id: int | None) -> pl.DataFrame:
+        df = df.filter(pl.col("year") == year).drop("year")
+        if athlete_id is not None and "athlete_id" in df.columns:
+            df = df.filter(pl.col("athlete_id") == athlete_id).drop("athlete_id")
+        return df
+
+    def mileage_for(self, year: int, athlete_id: int | None = None) -> pl.DataFrame:
+        return self._slice(self.mileage, year, athlete_id)
+
+
+def build_snapshot(df_runs: pl.DataFrame, race_results: pl.DataFrame, last_year: int | None = None) -> DashboardSnapshot:
+    """
+    Parameters
+    ----------
+    df_runs : polars DataFrame
+        The transformed runs.
+
+    race_results : polars DataFrame
+        The full race history sheet, including scheduled races.
+
+    Either both frames or neither have an "athlete_id" column.
+
+    last_year : int
+        Last year to report, passed on to `yearly_metrics_table`.
+
+    Returns
+    -------
+    DashboardSnapshot
+        The yearly metrics and the daily mileage bins the chart plots,
+        stacked with a "year" column. The runs table is paged from `runs`
+        by `RunsTablePager`, so it isn't precomputed.
+    """
+    official = race_results.filter(pl.col("official_time_in_seconds").is_not_null())
+    yearly_metrics = format_yearly_metrics(yearly_metrics_table(df_runs, official, last_year=last_year))
+    mileage = mileage_bins(df_runs, "day").with_columns(pl.col("date").dt.year().cast(pl.Int32).alias("year"))
+
+    return DashboardSnapshot(
+        created_at=datetime.now().isoformat(timespec="seconds"),
+        runs=df_runs,
+        race_results=race_results,
+        yearly_metrics=yearly_metrics,
+        mileage=mileage,
+    )
+
+
+def write_snapshot(snapshot: DashboardSnapshot, root: str = SNAPSHOT_ROOT) -> str:
+    """
+    Write `snapshot` to a new version directory under `root` and point
+    `root/LATEST` at it. Readers of LATEST never see a half-written snapshot.
+    """
+    version_dir = os.path.join(root, snapshot.created_at.replace(":", ""))
+    os.makedirs(version_dir, exist_ok=True)
+
+    for name in _FRAMES:
+        getattr(snapshot, name).write_parquet(os.path.join(version_dir, f"{name}.parquet"))
+
+    with open(os.path.join(version_dir, "manifest.json"), "w") as _f:
+        json.dump({
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": snapshot.created_at,
+            "years": snapshot.yearly_metrics["year"].unique(maintain_order=True).to_list(),
+            "frames": {name: f"{name}.parquet" for name in _FRAMES},
+        }, _f, indent=2)
+
+    _pointer = os.path.join(root, LATEST_POINTER)
+    with open(f"{_pointer}.tmp", "w") as _f:
+        _f.write(os.path.basename(version_dir))
+    os.replace(f"{_pointer}.tmp", _pointer)
+    return version_dir
+
+
+def read_snapshot(path: str = SNAPSHOT_ROOT) -> DashboardSnapshot:
+    """Open a snapshot directory, or the latest one under a snapshot root."""
+    _pointer = os.path.join(path, LATEST_POINTER)
+    if os.path.exists(_pointer):
+        with open(_pointer, "r") as _f:
+            path = os.path.join(path, _f.read().strip())
+
+    with open(os.path.join(path, "manifest.json"), "r") as _f:
+        manifest = json.load(_f)
+    if manifest["format_version"] != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(
+            f"Snapshot format {manifest['format_version']} is not supported "
+            f"(expected {SNAPSHOT_FORMAT_VERSION}); rebuild it with `python -m running_dashboard snapshot`."
+        )
+
+    frames = {name: pl.read_parquet(os.path.join(path, file)) for name, file in manifest["frames"].items()}
+    return DashboardSnapshot(created_at=manifest["created_at"], **frames)
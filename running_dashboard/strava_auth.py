@@ -0,0 +1,161 @@
+"""Shared, persisted Strava OAuth token that refreshes ahead of expiry."""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+STRAVA_TOKEN_PATH = "strava_token.json"
+STRAVA_CLIENT_PATH = "strava_client.txt"
+
+
+def read_client_credentials(path: str = STRAVA_CLIENT_PATH) -> tuple[str, str]:
+    """Return the (client_id, client_secret) pair stored as "id,secret"."""
+    with open(path, "r") as _f:
+        client_id, client_secret = _f.read().strip().split(",")
+    return client_id, client_secret
+
+
+def stravalib_refresher(client_id: str, client_secret: str):
+    """Build a refresh callable backed by stravalib's OAuth endpoint."""
+    from stravalib import Client
+
+    def refresh(refresh_token: str) -> dict:
+        response = Client().refresh_access_token(
+            client_id=client_id,
+            client_secret=client_secret,
+            refresh_token=refresh_token)
+        return {
+            "access_token": response["access_token"],
+            "refresh_token": response["refresh_token"],
+            "expires_at": response["expires_at"],
+        }
+
+    return refresh
+
+
+class StravaTokenManager:
+    """
+    Keeps one valid Strava token on disk for every process that needs it.
+
+    The token file is guarded by an advisory `flock` on a sibling lock file,
+    so the dashboard and a sync job never refresh at the same time and both
+    pick up whichever refreshed token was written first. Refreshed tokens are
+    written atomically.
+
+    Parameters
+    ----------
+    refresh : callable
+        Takes a refresh token and returns a dict with "access_token",
+        "refresh_token" and "expires_at". See `stravalib_refresher`.
+
+    token_path : str
+        Location of the persisted token JSON.
+
+    refresh_margin : int
+        Seconds before `expires_at` at which a token is refreshed.
+
+    Example
+    --------
+    >>> manager = StravaTokenManager(stravalib_refresher(*read_client_credentials()))
+    >>> manager.apply_to(client)
+    >>> manager.start_background_refresh()
+    """
+
+    def __init__(self, refresh, token_path: str = STRAVA_TOKEN_PATH, refresh_margin: int = 10 * 60, clock=time.time):
+        self.refresh = refresh
+        self.token_path = token_path
+        self.lock_path = f"{token_path}.lock"
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._stop = threading.Event()
+        self._thread = None
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with open(self.lock_path, "a") as _lock_file:
+            fcntl.flock(_lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(_lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> dict:
+        with open(self.token_path, "r") as _f:
+            return json.load(_f)
+
+    def _write(self, token: dict) -> None:
+        _tmp_path = f"{self.token_path}.tmp"
+        with open(_tmp_path, "w") as _f:
+            json.dump(token, _f)
+        os.replace(_tmp_path, self.token_path)
+
+    def _is_due(self, token: dict) -> bool:
+        return self._clock() >= token["expires_at"] - self.refresh_margin
+
+    def read(self) -> dict:
+        """Return the stored token as-is."""
+        with self._locked(exclusive=False):
+            return self._read()
+
+    def refresh_now(self, force: bool = False) -> dict:
+        """Refresh the stored token if it is due (or `force`) and return it."""
+        with self._locked(exclusive=True):
+            token = self._read()
+            # Another process may have refreshed while we waited for the lock.
+            if force or self._is_due(token):
+                token = {**token, **self.refresh(token["refresh_token"])}
+                self._write(token)
+            return token
+
+    def get_token(self) -> dict:
+        """
+        Return a usable token, only blocking on the auth server if it has
+        already expired. A token inside the refresh margin is returned
+        immediately and refreshed in the background.
+        """
+        token = self.read()
+        if self._clock() >= token["expires_at"]:
+            return self.refresh_now()
+        if self._is_due(token):
+            threading.Thread(target=self.refresh_now, daemon=True).start()
+        return token
+
+    def apply_to(self, client) -> dict:
+        """Load a usable token onto a stravalib `Client`."""
+        token = self.get_token()
+        client.access_token = token["access_token"]
+        client.refresh_token = token["refresh_token"]
+        client.token_expires_at = token["expires_at"]
+        return token
+
+    def start_background_refresh(self, client=None) -> None:
+        """Refresh ahead of every expiry on a daemon thread until `stop()`."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def _run():
+            while not self._stop.is_set():
+                token = self.read()
+                wait = token["expires_at"] - self.refresh_margin - self._clock()
+                if self._stop.wait(max(0, wait)):
+                    return
+                try:
+                    token = self.refresh_now()
+                except Exception:
+                    # Back off and retry; the current token may still be valid.
+                    self._stop.wait(60)
+                    continue
+                if client is not None:
+                    client.access_token = token["access_token"]
+                    client.refresh_token = token["refresh_token"]
+                    client.token_expires_at = token["expires_at"]
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
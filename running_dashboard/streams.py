@@ -0,0 +1,211 @@
+"""Per-activity streams in memory-mapped Arrow IPC files, and best efforts from them."""
+
+import glob
+import os
+
+import polars as pl
+
+from running_dashboard.activity_details import ACTIVITY_DETAILS_DIR, load_cached_details
+from running_dashboard.formatting import format_duration, format_pace
+
+STREAMS_ROOT = "data/streams"
+
+STREAM_SCHEMA = {
+    "activity_id": pl.Int64,
+    "time": pl.Int32,
+    "distance": pl.Float64,
+    "heartrate": pl.Int16,
+    "altitude": pl.Float32,
+}
+
+# Effort name to distance in meters, shortest first.
+BEST_EFFORT_DISTANCES = {
+    "400m": 400.0,
+    "1 Mile": 1609.344,
+    "5K": 5000.0,
+    "10K": 10000.0,
+    "Half Marathon": 21097.5,
+}
+
+# Spacing, in meters, between activities on the combined distance axis used
+# by `best_efforts`. Longer than any single activity.
+_ACTIVITY_SPACING = 1e7
+
+
+def streams_to_frame(activity_id: int, streams: dict) -> pl.DataFrame:
+    """
+    Turn a `key_by_type` Strava streams payload into STREAM_SCHEMA rows, one
+    per sample. Streams missing from the payload are left null.
+    """
+    n = len(streams.get("time", {}).get("data", []))
+    return pl.DataFrame(
+        {
+            "activity_id": [activity_id] * n,
+            **{
+                key: streams[key]["data"] if key in streams else [None] * n
+                for key in ["time", "distance", "heartrate", "altitude"]
+            },
+        },
+        schema=STREAM_SCHEMA,
+    )
+
+
+def _athlete_dir(root: str, athlete_id: int) -> str:
+    return os.path.join(root, f"athlete_id={athlete_id}")
+
+
+def stream_files(athlete_id: int, root: str = STREAMS_ROOT) -> list[str]:
+    """Every stream chunk file of one athlete, oldest first."""
+    return sorted(glob.glob(os.path.join(_athlete_dir(root, athlete_id), "part-*.arrow")))
+
+
+def scan_streams(athlete_id: int, root: str = STREAMS_ROOT) -> pl.LazyFrame:
+    """
+    Lazily scan one athlete's streams. The chunks are uncompressed IPC, so
+    Polars memory-maps them and only the selected columns are paged in.
+    """
+    files = stream_files(athlete_id, root)
+    if not files:
+        return pl.LazyFrame(schema=STREAM_SCHEMA)
+    return pl.scan_ipc(files)
+
+
+def stored_stream_ids(athlete_id: int, root: str = STREAMS_ROOT) -> set[int]:
+    return set(scan_streams(athlete_id, root).select(pl.col("activity_id").unique()).collect()["activity_id"])
+
+
+def write_stream_chunk(df: pl.DataFrame, athlete_id: int, root: str = STREAMS_ROOT) -> str | None:
+    """
+    Atomically add `df` to an athlete's store as a new chunk file. Chunks
+    are never rewritten, so existing files stay valid for open memory maps.
+    """
+    if df.is_empty():
+        return None
+    athlete_dir = _athlete_dir(root, athlete_id)
+    os.makedirs(athlete_dir, exist_ok=True)
+    _path = os.path.join(athlete_dir, f"part-{len(stream_files(athlete_id, root)):05d}.arrow")
+    _tmp_path = f"{_path}.tmp"
+    df.sort("activity_id", "time").write_ipc(_tmp_path, compression="uncompressed")
+    os.replace(_tmp_path, _path)
+    return _path
+
+
+def ingest_cached_streams(
+    activity_ids,
+    athlete_id: int,
+    cache_dir: str = ACTIVITY_DETAILS_DIR,
+    root: str = STREAMS_ROOT,
+) -> int:
+    """
+    Move the streams of `activity_ids` from the JSON detail cache (written by
+    `ActivityDetailFetcher`) into a new chunk of the athlete's stream store.
+    Activities already stored, or not fetched yet, are skipped. Returns the
+    number of activities added.
+    """
+    stored = stored_stream_ids(athlete_id, root)
+    frames = []
+    for activity_id in activity_ids:
+        if activity_id in stored:
+            continue
+        details = load_cached_details(activity_id, cache_dir)
+        if details is None or not details.get("streams"):
+            continue
+        frames.append(streams_to_frame(activity_id, details["streams"]))
+
+    write_stream_chunk(pl.concat(frames) if frames else pl.DataFrame(schema=STREAM_SCHEMA), athlete_id, root)
+    return len(frames)
+
+
+def best_efforts(streams: pl.LazyFrame | pl.DataFrame, distances: dict = BEST_EFFORT_DISTANCES) -> pl.DataFrame:
+    """
+    Parameters
+    ----------
+    streams : polars LazyFrame or DataFrame
+        Stream samples with at least "activity_id", "time" and "distance".
+
+    distances : dict
+        Effort name to distance in meters.
+
+    Returns
+    -------
+    polars DataFrame
+        One (activity_id, effort, elapsed_secs) row per activity and effort
+        the activity was long enough for, with the fastest time for that
+        distance anywhere within the activity.
+
+    Notes
+    -----
+    Every activity's distance stream is shifted onto one increasing axis, so
+    for every sample the latest sample at least `distance` meters behind it
+    is found with a single vectorized `search_sorted` over all activities at
+    once, instead of comparing every pair of samples. The elapsed time over
+    the covered stretch is scaled down to the exact effort distance.
+    """
+    samples = (
+        streams.lazy()
+        .select("activity_id", "time", "distance")
+        .drop_nulls()
+        .sort("activity_id", "time")
+        .with_columns(pl.col("distance").cum_max().over("activity_id"))
+        .with_columns(
+            (pl.col("activity_id").rank("dense") * _ACTIVITY_SPACING + pl.col("distance")).alias("axis")
+        )
+    )
+
+    efforts = [
+        samples
+        .with_columns(
+            (pl.col("axis").search_sorted(pl.col("axis") - meters, side="right").cast(pl.Int64) - 1).alias("start")
+        )
+        .with_columns(
+            pl.col("activity_id").gather(pl.col("start").clip(0)).alias("start_activity_id"),
+            (pl.col("time") - pl.col("time").gather(pl.col("start").clip(0))).alias("elapsed"),
+            (pl.col("distance") - pl.col("distance").gather(pl.col("start").clip(0))).alias("covered"),
+        )
+        .filter((pl.col("start") >= 0) & (pl.col("start_activity_id") == pl.col("activity_id")))
+        .group_by("activity_id")
+        .agg((pl.col("elapsed") * meters / pl.col("covered")).min().round(0).cast(pl.Int64).alias("elapsed_secs"))
+        .with_columns(pl.lit(name).alias("effort"))
+        for name, meters in distances.items()
+    ]
+
+    return (
+        pl.concat(efforts)
+        .select("activity_id", "effort", "elapsed_secs")
+        .sort("activity_id", pl.col("effort").cast(pl.Enum(list(distances))))
+        .collect()
+    )
+
+
+def athlete_best_efforts(athlete_id: int, root: str = STREAMS_ROOT) -> pl.DataFrame:
+    """`best_efforts` for every stored activity of one athlete, one chunk file at a time."""
+    return pl.concat(
+        [best_efforts(pl.scan_ipc(_path)) for _path in stream_files(athlete_id, root)]
+        or [pl.DataFrame(schema={"activity_id": pl.Int64, "effort": pl.String, "elapsed_secs": pl.Int64})]
+    )
+
+
+def personal_records(efforts: pl.DataFrame, df_runs: pl.DataFrame, distances: dict = BEST_EFFORT_DISTANCES) -> pl.DataFrame:
+    """
+    The fastest effort at each distance across `df_runs`, as a display table
+    with the time, the pace per mile and the run it came from.
+    """
+    effort_order = pl.Enum(list(distances))
+    return (
+        efforts
+        .join(df_runs.select(pl.col("id").alias("activity_id"), "date", "name"), on="activity_id", how="inner")
+        .sort("elapsed_secs")
+        .group_by("effort")
+        .first()
+        .with_columns(pl.col("effort").cast(effort_order))
+        .sort("effort")
+        .select(
+            pl.col("effort").cast(pl.String),
+            format_duration(pl.col("elapsed_secs")).alias("time"),
+            format_pace(
+                pl.col("elapsed_secs") / pl.col("effort").cast(pl.String).replace_strict(distances) * 1609.344
+            ).alias("pace"),
+            "date",
+            "name",
+        )
+    )
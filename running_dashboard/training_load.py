@@ -0,0 +1,135 @@
+"""Rolling mileage and ATL/CTL/TSB training load on a gap-filled daily series."""
+
+from datetime import date
+
+import polars as pl
+
+ATL_DAYS = 7
+CTL_DAYS = 42
+# Days of history before an update's first changed day that the rolling
+# windows need (the 28-day sum reaches back 27 days).
+CONTEXT_DAYS = 27
+
+LOAD_COLUMNS = ["date", "distance_miles", "miles_7d", "miles_28d", "atl", "ctl", "tsb", "ramp_rate"]
+
+
+def daily_load(df_runs: pl.DataFrame, end: date | None = None) -> pl.DataFrame:
+    """
+    Daily mileage from the first run through `end` (default today), with a
+    zero row for every day without a run.
+    """
+    daily = df_runs.group_by("date").agg(pl.col("distance_miles").sum()).sort("date")
+    if daily.is_empty():
+        return pl.DataFrame(schema={"date": pl.Date, "distance_miles": pl.Float64})
+
+    end = max(end or date.today(), daily["date"].max())
+    days = pl.date_range(daily["date"].min(), end, interval="1d", eager=True).alias("date").to_frame()
+    return days.join(daily, on="date", how="left").with_columns(pl.col("distance_miles").fill_null(0.0))
+
+
+def _rolling_miles(window: int) -> pl.Expr:
+    # Running sums drift below zero over long gaps; floor them at exactly 0.
+    miles = pl.col("distance_miles").rolling_sum(window, min_samples=1).round(2)
+    return pl.when(miles > 0).then(miles).otherwise(0.0)
+
+
+def _seeded_ewm(loads: pl.Series, days: int, seed: float | None) -> pl.Series:
+    # ewm_mean(adjust=False) starts from its first value, so prepending the
+    # previous day's level continues the recursion exactly where it stopped.
+    alpha = 1 / days
+    if seed is None:
+        return loads.ewm_mean(alpha=alpha, adjust=False)
+    return pl.concat([pl.Series([seed], dtype=pl.Float64), loads]).ewm_mean(alpha=alpha, adjust=False).slice(1)
+
+
+def compute_training_load(daily: pl.DataFrame, context: pl.DataFrame | None = None, seed: dict | None = None) -> pl.DataFrame:
+    """
+    Parameters
+    ----------
+    daily : polars DataFrame
+        Gap-filled (date, distance_miles) rows to compute load for.
+
+    context : polars DataFrame
+        The already-computed days just before `daily`, used only to fill the
+        rolling windows.
+
+    seed : dict
+        The "atl" and "ctl" of the day before `daily`, to continue from.
+
+    Returns
+    -------
+    polars DataFrame
+        `daily` with rolling 7/28-day mileage, ATL (7-day) and CTL (42-day)
+        exponentially weighted load, TSB (CTL - ATL) and the week-over-week
+        ramp rate of the 7-day mileage (null after a week with no miles).
+    """
+    seed = seed or {}
+    context = (context if context is not None else daily.clear()).select("date", "distance_miles")
+    loads = daily["distance_miles"].cast(pl.Float64)
+
+    return (
+        pl.concat([context, daily.select("date", "distance_miles")])
+        .with_columns(
+            _rolling_miles(7).alias("miles_7d"),
+            _rolling_miles(28).alias("miles_28d"),
+        )
+        .with_columns(
+            pl.when(pl.col("miles_7d").shift(7) > 0)
+            .then(pl.col("miles_7d") / pl.col("miles_7d").shift(7) - 1)
+            .alias("ramp_rate")
+        )
+        .slice(len(context))
+        .with_columns(
+            _seeded_ewm(loads, ATL_DAYS, seed.get("atl")).alias("atl"),
+            _seeded_ewm(loads, CTL_DAYS, seed.get("ctl")).alias("ctl"),
+        )
+        .with_columns((pl.col("ctl") - pl.col("atl")).alias("tsb"))
+        .select(LOAD_COLUMNS)
+    )
+
+
+class TrainingLoad:
+    """
+    One athlete's training load series, updated incrementally.
+
+    `update` compares the new daily mileage with the stored series and only
+    recomputes from the first day that changed (new activities, edits or
+    simply a new day), seeding the EWMAs and rolling windows from the
+    unchanged days before it.
+
+    Example
+    --------
+    >>> training_load = TrainingLoad()
+    >>> training_load.update(df_runs).tail(1)
+    """
+
+    def __init__(self):
+        self.series = None
+
+    def update(self, df_runs: pl.DataFrame, end: date | None = None) -> pl.DataFrame:
+        daily = daily_load(df_runs, end)
+        if self.series is None or self.series.is_empty() or daily.is_empty():
+            self.series = compute_training_load(daily)
+            return self.series
+
+        changed = (
+            daily.join(self.series.select("date", "distance_miles"), on="date", how="full", coalesce=True, suffix="_stored")
+            .filter(pl.col("distance_miles").ne_missing(pl.col("distance_miles_stored")))
+            .select(pl.col("date").min())
+            .item()
+        )
+        if changed is None:
+            return self.series
+
+        kept = self.series.filter(pl.col("date") < changed)
+        if kept.is_empty():
+            self.series = compute_training_load(daily)
+            return self.series
+
+        tail = compute_training_load(
+            daily.filter(pl.col("date") >= changed),
+            context=kept.tail(CONTEXT_DAYS),
+            seed=kept.row(-1, named=True),
+        )
+        self.series = pl.concat([kept, tail])
+        return self.series
@@ -0,0 +1,312 @@
+"""Locally stored, revalidated Hal Higdon training plans."""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import polars as pl
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+
+from running_dashboard.instrumentation import metrics
+
+TRAINING_PLAN_CACHE_DIR = "data/training_plans"
+TRAINING_PLAN_TTL_SECS = 7 * 24 * 60 * 60
+TRAINING_PLAN_TIMEOUT_SECS = 10
+DEFAULT_USER_AGENT = os.environ.get(
+    "TRAINING_PLAN_USER_AGENT",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+)
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+_TABLESAW_START = re.compile(r"""<table\b[^>]*\bclass=["'][^"']*\btablesaw\b""", re.IGNORECASE)
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+logger = logging.getLogger(__name__)
+
+
+def make_session(user_agent: str = DEFAULT_USER_AGENT, pool_size: int = 8) -> requests.Session:
+    """A keep-alive session with a connection pool sized for `pool_size` workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": user_agent,
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    return metrics.instrument_session(session, "training_plans")
+
+
+def plan_urls(training_plans: dict) -> list[str]:
+    """Every distinct plan URL in a `hh_training_plans`-shaped dictionary."""
+    return list(dict.fromkeys(
+        plan["url"] for levels in training_plans.values() for plan in levels.values()
+    ))
+
+
+def parse_training_plan(html: str) -> pl.DataFrame:
+    """
+    Parse a plan page's table into a long (week, day_of_week, training) frame.
+
+    Only the `table.tablesaw` subtree is parsed: the table's markup is cut
+    out of the page before it reaches BeautifulSoup, falling back to a
+    SoupStrainer over the whole page if it can't be located. Rows from every
+    `tbody` are kept. Cells are appended straight into column lists, so the
+    frame is created once with no per-week dicts and no unpivot.
+    """
+    start = _TABLESAW_START.search(html)
+    end = html.find("</table>", start.start()) if start else -1
+    if start and end != -1 and html.count("<table", start.end(), end) == 0:
+        table = BeautifulSoup(html[start.start():end + len("</table>")], HTML_PARSER).find("table")
+    else:
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer("table", class_="tablesaw"))
+        table = soup.find("table")
+
+    weeks, days, trainings = [], [], []
+    for row in table.find_all("tr"):
+        cells = row.find_all("td", recursive=False)
+        if len(cells) < len(DAYS_OF_WEEK) + 1:
+            continue
+        week = cells[0].get_text(strip=True)
+        for day, cell in zip(DAYS_OF_WEEK, cells[1:]):
+            weeks.append(week)
+            days.append(day)
+            trainings.append(cell.text)
+
+    return pl.DataFrame(
+        {"week": weeks, "day_of_week": days, "training": trainings}
+    ).with_columns(pl.col("week").cast(pl.Int32))
+
+
+def plan_catalog(training_plans: dict) -> pl.DataFrame:
+    """Flatten a `hh_training_plans`-shaped dictionary into (distance, level, url, no_of_weeks) rows."""
+    return pl.DataFrame(
+        [
+            {"distance": distance, "level": level, "url": plan["url"], "no_of_weeks": plan["no_of_weeks"]}
+            for distance, levels in training_plans.items()
+            for level, plan in levels.items()
+        ],
+        schema={"distance": pl.String, "level": pl.String, "url": pl.String, "no_of_weeks": pl.Int32},
+    )
+
+
+def generate_training_plans(plan_requests: pl.DataFrame, training_plans: dict, store) -> pl.DataFrame:
+    """
+    Parameters
+    ----------
+    plan_requests : polars DataFrame
+        One row per plan wanted, with at least "distance", "level" and a
+        `pl.Date` "race_date". Any other columns (e.g. "athlete",
+        "on_sunday") are carried through to every output row.
+
+    training_plans : dict
+        The `hh_training_plans` dictionary.
+
+    store : TrainingPlanStore
+        Supplies the parsed plan template for each distinct URL, once.
+
+    Returns
+    -------
+    polars DataFrame
+        The request columns plus "date", "week", "day_of_week" and
+        "training", one row per plan day, with every plan ending on its
+        race date.
+
+    Notes
+    -----
+    Each template gets a "days_to_race" offset once. Dating every plan is
+    then a single join and date subtraction, so the cost grows linearly
+    with the number of plan days produced.
+
+    Example
+    --------
+    >>> generate_training_plans(
+    ...     pl.DataFrame({"athlete": ["Ann"], "distance": ["5K"], "level": ["Novice"],
+    ...                   "race_date": [date(2025, 5, 4)], "on_sunday": [True]}),
+    ...     hh_training_plans,
+    ...     plan_store,
+    ... )
+    """
+    request_columns = plan_requests.columns
+    matched = plan_requests.join(plan_catalog(training_plans), on=["distance", "level"], how="left", maintain_order="left")
+
+    unknown = matched.filter(pl.col("url").is_null()).select("distance", "level").unique()
+    if not unknown.is_empty():
+        raise ValueError(f"No training plan for: {unknown.rows()}")
+
+    day_index = {day: i for i, day in enumerate(DAYS_OF_WEEK)}
+    templates = pl.concat([
+        store.get(url).with_columns(pl.lit(url).alias("url"))
+        for url in matched["url"].unique(maintain_order=True)
+    ]).with_columns(
+        ((pl.col("week") - 1) * 7 + pl.col("day_of_week").replace_strict(day_index, return_dtype=pl.Int32)).alias("day_no")
+    ).with_columns(
+        (pl.col("day_no").max().over("url") - pl.col("day_no")).alias("days_to_race")
+    )
+
+    return (
+        matched.lazy()
+        .join(templates.lazy(), on="url", how="inner", maintain_order="left_right")
+        .with_columns((pl.col("race_date") - pl.duration(days=pl.col("days_to_race"))).alias("date"))
+        .select(*request_columns, "date", "week", "day_of_week", "training")
+        .collect()
+    )
+
+
+class TrainingPlanStore:
+    """
+    Parsed training plans kept in memory and as Parquet on disk, keyed by URL.
+
+    A stored plan younger than `ttl` is used as-is. An older one is
+    revalidated with a conditional GET (ETag / Last-Modified) and only
+    re-parsed when the page actually changed. If a stored plan cannot be
+    revalidated, because the request fails or takes longer than `timeout`
+    seconds, the stored copy is returned.
+
+    Example
+    --------
+    >>> store = TrainingPlanStore()
+    >>> store.get(hh_training_plans["5K"]["Novice"]["url"])
+    """
+
+    def __init__(
+        self,
+        user_agent: str = DEFAULT_USER_AGENT,
+        cache_dir: str = TRAINING_PLAN_CACHE_DIR,
+        ttl: float = TRAINING_PLAN_TTL_SECS,
+        session: requests.Session | None = None,
+        clock=time.time,
+        timeout: float = TRAINING_PLAN_TIMEOUT_SECS,
+    ):
+        self.user_agent = user_agent
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = session or make_session(user_agent)
+        self._clock = clock
+        self._plans = {}
+        # One lock per URL, so the prefetch thread and the UI never fetch
+        # and write the same plan at once.
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, url: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.parquet"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_meta(self, url: str) -> dict | None:
+        plan_path, meta_path = self._paths(url)
+        if not (os.path.exists(plan_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, "r") as _f:
+            return json.load(_f)
+
+    def _replace(self, path: str, write) -> None:
+        # A unique temp file per write, so no two writers share one.
+        _fd, _tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(_fd)
+        try:
+            write(_tmp_path)
+            os.replace(_tmp_path, path)
+        except BaseException:
+            os.remove(_tmp_path)
+            raise
+
+    def _write(self, url: str, plan: pl.DataFrame | None, meta: dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        plan_path, meta_path = self._paths(url)
+        if plan is not None:
+            self._replace(plan_path, plan.write_parquet)
+
+        def _write_meta(path):
+            with open(path, "w") as _f:
+                json.dump(meta, _f)
+
+        self._replace(meta_path, _write_meta)
+
+    def get(self, url: str) -> pl.DataFrame:
+        """
+        Return the parsed plan for `url`, fetching only when needed. A
+        caller asking for a URL that is already being fetched waits for
+        that fetch and then reads its result.
+        """
+        with self._lock(url):
+            meta = self._read_meta(url)
+            fresh = meta is not None and self._clock() - meta["fetched_at"] < self.ttl
+            metrics.cache("training_plans", hit=fresh)
+            if fresh:
+                return self._stored(url)
+            return self._refresh(url, meta)
+
+    def _stored(self, url: str) -> pl.DataFrame:
+        if url not in self._plans:
+            self._plans[url] = pl.read_parquet(self._paths(url)[0])
+        return self._plans[url]
+
+    def refresh(self, url: str, meta: dict | None = None) -> pl.DataFrame:
+        """Revalidate `url` against the server and return the current plan."""
+        with self._lock(url):
+            return self._refresh(url, meta)
+
+    def _refresh(self, url: str, meta: dict | None) -> pl.DataFrame:
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            req = self.session.get(url=url, headers=headers, timeout=self.timeout)
+            if not (req.status_code == 304 and meta is not None):
+                req.raise_for_status()
+        except requests.RequestException as e:
+            if meta is None:
+                raise
+            logger.warning("Could not revalidate %s (%s); using the stored plan.", url, e)
+            return self._stored(url)
+
+        if req.status_code == 304:
+            self._write(url, None, {**meta, "fetched_at": self._clock()})
+            return self._stored(url)
+
+        plan = parse_training_plan(req.text)
+        self._write(url, plan, {
+            "url": url,
+            "fetched_at": self._clock(),
+            "etag": req.headers.get("ETag"),
+            "last_modified": req.headers.get("Last-Modified"),
+        })
+        self._plans[url] = plan
+        return plan
+
+    def prefetch(self, urls, max_workers: int = 4) -> dict:
+        """
+        Load every plan in `urls` concurrently, at most `max_workers` at a
+        time, and return the URLs that failed with their exceptions.
+        """
+        failed = {}
+
+        def _get(url):
+            try:
+                self.get(url)
+            except Exception as e:
+                failed[url] = e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(_get, urls))
+        return failed
@@ -0,0 +1,53 @@
+"""Transforms from the raw Strava import to the frames the dashboard shows."""
+
+import polars as pl
+
+RUN_COLUMNS = [
+    "id",
+    "name",
+    "is_race",
+    "date",
+    "time_in_secs",
+    "distance_miles",
+    "secs_per_mile",
+    "total_elev_gain_ft",
+    "elev_low_ft",
+    "elev_high_ft",
+    "average_cadence",
+    "average_heartrate",
+    "max_heartrate",
+    "workout_type",
+    "gear_id",
+    "tracking_method",
+]
+
+
+def _athlete_key(df: pl.DataFrame) -> list[str]:
+    return ["athlete_id"] if "athlete_id" in df.columns else []
+
+
+def transform_runs(df_runs_import: pl.DataFrame) -> pl.DataFrame:
+    """
+    Convert units and derive the columns `df_runs` is built from. An
+    "athlete_id" column, if present, is kept as the first column.
+    """
+    return (
+        df_runs_import
+        .with_columns(
+            (pl.col("distance") * 0.000621371).round(2).alias("distance_miles"), # meters to miles
+            pl.col("elapsed_time").alias("time_in_secs"),
+            (pl.col("total_elevation_gain") * 3.28084).round(2).alias("total_elev_gain_ft"), # meters to feet
+            (pl.col("elev_high") * 3.28084).round(2).alias("elev_high_ft"), # meters to feet
+            (pl.col("elev_low") * 3.28084).round(2).alias("elev_low_ft"), # meters to feet
+            ((26.8224/pl.col("average_speed")) * 60).alias("secs_per_mile"),
+            pl.when(pl.col("external_id").str.contains("garmin"))
+                .then(pl.lit("Recorded w/ Garmin GPS"))
+                .otherwise(pl.lit("Not Recorded w/Garmin GPS"))
+                .alias("tracking_method"),
+            pl.col("start_date").cast(pl.Date).alias("date"),
+            pl.when(pl.col("workout_type") == 1).then(True).otherwise(False).alias("is_race"),
+            pl.when(pl.col("workout_type") == 1).then(pl.col("name")).otherwise(None)
+        )
+        .select(*_athlete_key(df_runs_import), *RUN_COLUMNS)
+    )
+
@@ -0,0 +1,112 @@
+"""Memoized per-(athlete, year) views behind the dashboard's year dropdown."""
+
+from dataclasses import dataclass
+
+import polars as pl
+
+from running_dashboard.chart_data import MileageBinCache
+from running_dashboard.instrumentation import metrics
+from running_dashboard.runs_pager import RunsTablePager
+
+
+@dataclass(frozen=True)
+class YearView:
+    """Everything the dashboard shows for one athlete and year, ready to render."""
+
+    runs_pager: RunsTablePager
+    bin_size: str
+    mileage: pl.DataFrame
+    chart: object
+    stats: dict
+
+
+def format_year_stats(metrics: dict | None) -> dict:
+    """The display strings of one `format_yearly_metrics` row."""
+    if metrics is None:
+        return {
+            "total_miles": "0.00 miles",
+            "avg_run_pace": "-/mile",
+            "no_of_races": "0 races",
+            "race_miles": "0.00 miles",
+            "avg_race_pace": "-/mile",
+        }
+    return {
+        "total_miles": "{:,.2f} miles".format(metrics["distance_miles"]),
+        "avg_run_pace": f"{metrics['avg_run_pace_mins_per_mile']}/mile",
+        "no_of_races": f"{metrics['no_of_races']} races",
+        "race_miles": "{:,.2f} miles".format(metrics["race_miles"]),
+        "avg_race_pace": f"{metrics['avg_race_pace_mins_per_mile']}/mile",
+    }
+
+
+class YearViewCache:
+    """
+    YearViews keyed by (athlete_id, year), built on first request.
+
+    The runs are split by athlete and year once, up front, so building a
+    view never re-filters the whole history. The cache holds no reference
+    to newer data: build a new one whenever `df_runs` or `yearly_metrics`
+    change, and every view is recomputed from then on.
+
+    Parameters
+    ----------
+    df_runs : polars DataFrame
+        The transformed runs, with an "athlete_id" column.
+
+    yearly_metrics : polars DataFrame
+        `format_yearly_metrics` output for the same runs.
+
+    render_chart : callable
+        Called once per view as `render_chart(mileage, bin_size)`; whatever
+        it returns (an Altair chart, or its rendered HTML) is stored as-is.
+
+    mileage_cache : MileageBinCache
+        Shared bins for the chart. Built from `df_runs` if not given.
+
+    snapshot : DashboardSnapshot
+        Read the mileage bins from a snapshot instead.
+
+    Example
+    --------
+    >>> year_views = YearViewCache(df_runs, yearly_metrics, render_chart=mileage_bar_chart)
+    >>> year_views.get(2025, athlete_id=0).stats["total_miles"]
+    '1,024.50 miles'
+    """
+
+    def __init__(self, df_runs: pl.DataFrame, yearly_metrics: pl.DataFrame, render_chart, mileage_cache=None, snapshot=None):
+        self.render_chart = render_chart
+        self.mileage_cache = mileage_cache or MileageBinCache(df_runs)
+        self.snapshot = snapshot
+        runs = df_runs.with_columns(pl.col("date").dt.year().alias("year"))
+        self._runs = runs.partition_by("athlete_id", "year", as_dict=True)
+        self._no_runs = runs.clear()
+        self._metrics = {
+            (row["athlete_id"], row["year"]): row for row in yearly_metrics.iter_rows(named=True)
+        }
+        self._views = {}
+
+    def _build(self, year: int, athlete_id: int) -> YearView:
+        if self.snapshot is not None:
+            bin_size, mileage = "day", self.snapshot.mileage_for(year, athlete_id=athlete_id)
+        else:
+            bin_size, mileage = self.mileage_cache.for_year(year, athlete_id=athlete_id)
+
+        return YearView(
+            runs_pager=RunsTablePager(self._runs.get((athlete_id, year), self._no_runs)),
+            bin_size=bin_size,
+            mileage=mileage,
+            chart=self.render_chart(mileage, bin_size),
+            stats=format_year_stats(self._metrics.get((athlete_id, year))),
+        )
+
+    def get(self, year: int, athlete_id: int) -> YearView:
+        key = (athlete_id, year)
+        metrics.cache("year_views", hit=key in self._views)
+        if key not in self._views:
+            self._views[key] = self._build(year, athlete_id)
+        return self._views[key]
+
+    def warm(self, keys) -> None:
+        """Build the views for every (athlete_id, year) in `keys` ahead of time."""
+        for athlete_id, year in keys:
+            self.get(year, athlete_id)
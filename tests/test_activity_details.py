@@ -0,0 +1,155 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler
+
+from running_dashboard.activity_details import (
+    DAILY_WINDOW_SECS,
+    SHORT_WINDOW_SECS,
+    ActivityDetailFetcher,
+    StravaRateLimiter,
+    seconds_until_reset,
+)
+
+# 100 seconds past midnight UTC, so also 100 seconds into a quarter hour.
+START = 1_760_000_000 - 1_760_000_000 % DAILY_WINDOW_SECS + 100
+
+
+class FakeClock:
+    """Wall and monotonic time for the limiter and the stub server; `sleep` advances it."""
+
+    def __init__(self, now: float = START):
+        self.now = now
+        self.slept = []
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds: float) -> None:
+        with self._lock:
+            self.slept.append(seconds)
+            self.now += seconds
+
+
+class StubStrava:
+    """
+    Counts requests per 15-minute and daily window like Strava, answers with
+    its `X-RateLimit-*` headers and returns 429 once a window is used up.
+    `used` pre-loads usage, as if another process shared the quota.
+    """
+
+    def __init__(self, clock: FakeClock, short_limit: int, daily_limit: int, used: tuple[int, int] = (0, 0)):
+        self.clock = clock
+        self.limits = (short_limit, daily_limit)
+        self.usage = {}
+        self.requests = []
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        now = clock()
+        self.usage[("short", now // SHORT_WINDOW_SECS)], self.usage[("daily", now // DAILY_WINDOW_SECS)] = used
+
+    def handler(self):
+        stub = self
+
+        class _StravaHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    now = stub.clock()
+                    short_key, daily_key = ("short", now // SHORT_WINDOW_SECS), ("daily", now // DAILY_WINDOW_SECS)
+                    short_usage, daily_usage = stub.usage.get(short_key, 0), stub.usage.get(daily_key, 0)
+                    limited = short_usage >= stub.limits[0] or daily_usage >= stub.limits[1]
+                    if limited:
+                        stub.rate_limited += 1
+                    else:
+                        stub.usage[short_key] = short_usage = short_usage + 1
+                        stub.usage[daily_key] = daily_usage = daily_usage + 1
+                        stub.requests.append(self.path)
+
+                activity_id = int(re.search(r"/activities/(\d+)", self.path).group(1))
+                body = json.dumps(
+                    {"message": "Rate Limit Exceeded"} if limited
+                    else {"time": {"data": [0, 1]}} if "/streams" in self.path
+                    else {"id": activity_id, "laps": []}
+                ).encode()
+                self.send_response(429 if limited else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-RateLimit-Limit", "{},{}".format(*stub.limits))
+                self.send_header("X-RateLimit-Usage", f"{short_usage},{daily_usage}")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return _StravaHandler
+
+
+def make_fetcher(serve, stub: StubStrava, clock: FakeClock, cache_dir, **kwargs) -> ActivityDetailFetcher:
+    limiter = StravaRateLimiter(*stub.limits, clock=clock, sleep=clock.sleep, wall_clock=clock)
+    return ActivityDetailFetcher(
+        access_token="test-token",
+        cache_dir=str(cache_dir),
+        base_url=serve(stub.handler()),
+        limiter=limiter,
+        **kwargs,
+    )
+
+
+def test_seconds_until_reset_lands_on_window_boundaries():
+    assert seconds_until_reset(SHORT_WINDOW_SECS, START) == SHORT_WINDOW_SECS - 100
+    assert seconds_until_reset(DAILY_WINDOW_SECS, START) == DAILY_WINDOW_SECS - 100
+
+
+def test_fetch_all_waits_for_the_window_reset_instead_of_failing(serve, tmp_path):
+    clock = FakeClock()
+    stub = StubStrava(clock, short_limit=5, daily_limit=1000)
+    fetcher = make_fetcher(serve, stub, clock, tmp_path, max_workers=1)
+
+    summary = fetcher.fetch_all(list(range(1, 7)))
+
+    assert summary == {"fetched": 6, "cached": 0, "failed": []}
+    assert stub.rate_limited == 0
+    assert len(stub.requests) == 12
+    # 12 requests at 5 per window span three windows: two waits for a reset.
+    assert clock() >= START - 100 + 2 * SHORT_WINDOW_SECS
+
+
+def test_quota_used_by_another_process_waits_for_the_reset(serve, tmp_path):
+    clock = FakeClock()
+    stub = StubStrava(clock, short_limit=5, daily_limit=1000, used=(5, 5))
+    fetcher = make_fetcher(serve, stub, clock, tmp_path, max_workers=4)
+
+    summary = fetcher.fetch_all([1, 2])
+
+    assert summary["failed"] == []
+    assert stub.rate_limited >= 1
+    assert clock() >= START - 100 + SHORT_WINDOW_SECS
+
+
+def test_exhausted_daily_quota_waits_until_midnight_utc(serve, tmp_path):
+    clock = FakeClock()
+    stub = StubStrava(clock, short_limit=100, daily_limit=10, used=(0, 9))
+    fetcher = make_fetcher(serve, stub, clock, tmp_path, max_workers=1)
+
+    summary = fetcher.fetch_all([1])
+
+    assert summary["failed"] == []
+    assert clock() >= START - 100 + DAILY_WINDOW_SECS
+
+
+def test_fetch_all_resumes_from_the_cache(serve, tmp_path):
+    clock = FakeClock()
+    stub = StubStrava(clock, short_limit=100, daily_limit=1000)
+    fetcher = make_fetcher(serve, stub, clock, tmp_path)
+    (tmp_path / "1.json").write_text(json.dumps({"activity": {"id": 1}, "streams": {}}))
+
+    summary = fetcher.fetch_all([1, 2, 3])
+
+    assert summary == {"fetched": 2, "cached": 1, "failed": []}
+    assert {path.split("?")[0] for path in stub.requests} == {
+        "/activities/2", "/activities/2/streams", "/activities/3", "/activities/3/streams",
+    }
+    assert json.loads((tmp_path / "2.json").read_text())["activity"] == {"id": 2, "laps": []}
@@ -0,0 +1,63 @@
+import logging
+import os
+import threading
+from datetime import datetime
+
+import polars as pl
+
+from running_dashboard.activity_store import ACTIVITY_SCHEMA, sync_team, write_activity_store
+
+
+def activities(n: int, start_id: int = 1) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "id": list(range(start_id, start_id + n)),
+            "name": ["Run"] * n,
+            "type": ["Run"] * n,
+            "start_date": [datetime(2025, 1, 1 + i % 28) for i in range(n)],
+        }
+    ).select(
+        pl.col(name).cast(dtype) if name in ("id", "name", "type", "start_date") else pl.lit(None, dtype).alias(name)
+        for name, dtype in ACTIVITY_SCHEMA.items()
+    )
+
+
+def test_concurrent_writes_to_one_partition_never_share_a_temp_file(tmp_path):
+    path = str(tmp_path / "athlete_id=1" / "year=2025" / "activities.parquet")
+    frames = [activities(500, start_id=1000 * i) for i in range(8)]
+    start = threading.Barrier(len(frames))
+    errors = []
+
+    def _write(df):
+        start.wait()
+        try:
+            write_activity_store(df, path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_write, args=(df,)) for df in frames]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert any(pl.read_parquet(path).equals(df) for df in frames)
+    assert os.listdir(os.path.dirname(path)) == ["activities.parquet"]
+
+
+class FailingClient:
+    def get_activities(self, after):
+        raise ConnectionError("Strava is unreachable")
+
+
+def test_failed_athlete_sync_is_logged_and_keeps_stored_activities(tmp_path, caplog):
+    root = str(tmp_path)
+    stored = activities(3)
+    write_activity_store(stored, os.path.join(root, "athlete_id=1", "year=2025", "activities.parquet"))
+
+    with caplog.at_level(logging.WARNING, logger="running_dashboard.activity_store"):
+        team = sync_team({1: FailingClient()}, root=root)
+
+    assert team.drop("athlete_id").equals(stored)
+    assert "Could not sync athlete 1: Strava is unreachable" in caplog.text
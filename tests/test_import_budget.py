@@ -0,0 +1,11 @@
+from benchmarks.import_budget import DEFERRED_MODULES, STARTUP_MODULES, main, measure_import_time
+
+
+def test_no_deferred_module_is_imported_at_startup():
+    _, imported = measure_import_time(STARTUP_MODULES)
+
+    assert [m for m in DEFERRED_MODULES if m in imported] == []
+
+
+def test_startup_imports_fit_the_budget():
+    assert main() == 0
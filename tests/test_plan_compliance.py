@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+import polars as pl
+
+from running_dashboard.plan_compliance import parse_plan
+
+
+def plan_of(*training: str) -> pl.DataFrame:
+    return pl.DataFrame({
+        "date": [date(2025, 1, 6) + timedelta(days=i) for i in range(len(training))],
+        "week": [1] * len(training),
+        "day_of_week": ["Monday"] * len(training),
+        "training": list(training),
+    })
+
+
+def test_rest_and_cross_days_plan_no_miles():
+    parsed = parse_plan(plan_of("1 m walk", "Rest or 2 m run", "30 min cross", "2 m swim", "3 m run"))
+
+    assert parsed["workout"].to_list() == ["cross", "rest", "cross", "cross", "run"]
+    assert parsed["planned_miles"].to_list() == [0.0, 0.0, 0.0, 0.0, 3.0]
+
+
+def test_run_given_only_in_minutes_has_null_miles():
+    parsed = parse_plan(plan_of("30 min run"))
+
+    assert parsed.row(0, named=True)["planned_miles"] is None
+    assert parsed.row(0, named=True)["planned_minutes"] == 30
+
+
+def test_bracketed_sub_segments_add_no_miles():
+    parsed = parse_plan(plan_of("4 m run (3 m pace)", "8 m run (5 x 400 in the middle)", "2 m (1 m) + 3 m run"))
+
+    assert parsed["planned_miles"].to_list() == [4.0, 8.0, 5.0]
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from running_dashboard.race_history import load_race_history, read_cached_race_history
+
+RECORDS = [
+    {"date": "2024-05-04", "miles": 3.1, "official_time_in_seconds": 1500,
+     "official_pace_in_seconds": 484, "official_time": "25:00"},
+    {"date": "2024-10-13", "miles": 13.1, "official_time_in_seconds": 6600,
+     "official_pace_in_seconds": 504, "official_time": "1:50:00"},
+]
+
+
+class FakeSheetsClient:
+    """Stands in for `gspread.Client`: one spreadsheet whose rows and modified time tests can change."""
+
+    def __init__(self, records: list[dict], modified_time: str, reachable: bool = True):
+        self.records = records
+        self.modified_time = modified_time
+        self.reachable = reachable
+        self.downloads = 0
+        self.sheet1 = self
+
+    def __call__(self):
+        # Used as the `client_factory`.
+        if not self.reachable:
+            raise ConnectionError("Sheets is unreachable")
+        return self
+
+    def open(self, name: str):
+        return self
+
+    def get_lastUpdateTime(self) -> str:
+        return self.modified_time
+
+    def get_all_records(self) -> list[dict]:
+        self.downloads += 1
+        return self.records
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return os.path.join(tmp_path, "race_history", "0.parquet")
+
+
+def test_unchanged_sheet_is_read_from_the_cache(cache_path):
+    client = FakeSheetsClient(RECORDS, "2024-10-14T08:00:00Z")
+    first = load_race_history(client, "Race History", cache_path)
+
+    second = load_race_history(client, "Race History", cache_path)
+
+    assert client.downloads == 1
+    assert second.equals(first)
+    assert first["date"].to_list()[0].isoformat() == "2024-05-04"
+
+
+def test_changed_sheet_is_downloaded_and_recached(cache_path):
+    client = FakeSheetsClient(RECORDS[:1], "2024-05-05T08:00:00Z")
+    load_race_history(client, "Race History", cache_path)
+
+    client.records, client.modified_time = RECORDS, "2024-10-14T08:00:00Z"
+    df = load_race_history(client, "Race History", cache_path)
+
+    assert client.downloads == 2
+    assert df.height == 2
+    cached_df, cached_modified_time = read_cached_race_history(cache_path)
+    assert cached_df.equals(df)
+    assert cached_modified_time == "2024-10-14T08:00:00Z"
+
+
+def test_unreachable_sheets_falls_back_to_the_cache(cache_path):
+    client = FakeSheetsClient(RECORDS, "2024-10-14T08:00:00Z")
+    cached = load_race_history(client, "Race History", cache_path)
+
+    client.reachable = False
+
+    assert load_race_history(client, "Race History", cache_path).equals(cached)
+
+
+def test_unreachable_sheets_raises_with_nothing_cached(cache_path):
+    client = FakeSheetsClient(RECORDS, "2024-10-14T08:00:00Z", reachable=False)
+
+    with pytest.raises(ConnectionError):
+        load_race_history(client, "Race History", cache_path)
+    assert not os.path.exists(cache_path)
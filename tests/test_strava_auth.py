@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from running_dashboard import strava_auth
+from running_dashboard.strava_auth import StravaTokenManager
+
+NOW = 1_760_000_000
+MARGIN = 600
+
+
+class FakeRefresh:
+    """A refresh callable that hands out numbered tokens valid for six hours."""
+
+    def __init__(self):
+        self.calls = []
+        self.called = threading.Event()
+
+    def __call__(self, refresh_token: str) -> dict:
+        self.calls.append(refresh_token)
+        n = len(self.calls)
+        self.called.set()
+        return {"access_token": f"access-{n}", "refresh_token": f"refresh-{n}", "expires_at": NOW + 6 * 60 * 60}
+
+
+def write_token(path, expires_at: int) -> dict:
+    token = {"access_token": "access-0", "refresh_token": "refresh-0", "expires_at": expires_at, "athlete_id": 7}
+    with open(path, "w") as _f:
+        json.dump(token, _f)
+    return token
+
+
+def read_token(path) -> dict:
+    with open(path, "r") as _f:
+        return json.load(_f)
+
+
+@pytest.fixture
+def token_path(tmp_path):
+    return str(tmp_path / "strava_token.json")
+
+
+def make_manager(token_path, refresh) -> StravaTokenManager:
+    return StravaTokenManager(refresh, token_path=token_path, refresh_margin=MARGIN, clock=lambda: NOW)
+
+
+def test_valid_token_is_returned_without_refreshing(token_path):
+    token = write_token(token_path, NOW + 2 * MARGIN)
+    refresh = FakeRefresh()
+
+    assert make_manager(token_path, refresh).get_token() == token
+    assert refresh.calls == []
+
+
+def test_token_inside_the_margin_is_returned_and_refreshed_ahead(token_path):
+    token = write_token(token_path, NOW + MARGIN // 2)
+    refresh = FakeRefresh()
+    manager = make_manager(token_path, refresh)
+
+    assert manager.get_token() == token
+    assert refresh.called.wait(5)
+    # The background refresh writes the new token once it returns.
+    for _ in range(50):
+        if read_token(token_path)["access_token"] == "access-1":
+            break
+        time.sleep(0.01)
+    assert read_token(token_path) == {
+        **token, "access_token": "access-1", "refresh_token": "refresh-1", "expires_at": NOW + 6 * 60 * 60,
+    }
+    assert refresh.calls == ["refresh-0"]
+    assert manager.get_token()["access_token"] == "access-1"
+
+
+def test_expired_token_is_refreshed_before_returning(token_path):
+    write_token(token_path, NOW - 1)
+    refresh = FakeRefresh()
+
+    token = make_manager(token_path, refresh).get_token()
+
+    assert refresh.calls == ["refresh-0"]
+    assert token["access_token"] == "access-1"
+    # Fields the refresh doesn't return are kept.
+    assert token["athlete_id"] == 7
+    assert read_token(token_path) == token
+
+
+def test_failed_write_back_leaves_the_stored_token_intact(token_path, monkeypatch):
+    token = write_token(token_path, NOW - 1)
+
+    def _partial_dump(obj, f):
+        f.write('{"access_token": "acc')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(strava_auth.json, "dump", _partial_dump)
+    with pytest.raises(OSError):
+        make_manager(token_path, FakeRefresh()).refresh_now()
+
+    monkeypatch.undo()
+    assert read_token(token_path) == token
+
+
+def test_refresh_already_done_by_another_process_is_reused(token_path):
+    write_token(token_path, NOW - 1)
+    other_refresh, refresh = FakeRefresh(), FakeRefresh()
+    other, manager = make_manager(token_path, other_refresh), make_manager(token_path, refresh)
+    result = {}
+
+    # `other` holds the exclusive lock while it refreshes; `manager` waits on it.
+    with other._locked(exclusive=True):
+        waiter = threading.Thread(target=lambda: result.update(token=manager.refresh_now()))
+        waiter.start()
+        time.sleep(0.1)
+        assert waiter.is_alive()
+        other._write({**other._read(), **other_refresh("refresh-0")})
+    waiter.join(5)
+
+    assert refresh.calls == []
+    assert result["token"]["access_token"] == "access-1"
+    assert not os.path.exists(f"{token_path}.tmp")
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from running_dashboard.training_plans import TrainingPlanStore, parse_training_plan
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "training_plan.html"), "r") as _f:
+    PLAN_HTML = _f.read()
+
+ETAG = '"plan-v1"'
+
+
+def plan_server_handler(requests_seen: list, delay: float = 0.05):
+    class _PlanHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.headers.get("If-None-Match"))
+            # Slow enough that concurrent callers overlap.
+            time.sleep(delay)
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = PLAN_HTML.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return _PlanHandler
+
+
+@pytest.fixture
+def plan_url(serve):
+    requests_seen = []
+    return f"{serve(plan_server_handler(requests_seen))}/5k-novice/", requests_seen
+
+
+def test_parse_training_plan_reads_every_week_and_day():
+    plan = parse_training_plan(PLAN_HTML)
+
+    assert plan.shape == (21, 3)
+    assert plan["week"].unique().sort().to_list() == [1, 2, 3]
+    assert plan.row(1) == (1, "Tuesday", "1.5 m run")
+
+
+def test_concurrent_gets_on_a_cold_cache_fetch_once(plan_url, tmp_path):
+    url, requests_seen = plan_url
+    store = TrainingPlanStore(cache_dir=str(tmp_path))
+    start = threading.Barrier(8)
+
+    def _get(_):
+        start.wait()
+        return store.get(url)
+
+    for _ in range(10):
+        for path in tmp_path.iterdir():
+            path.unlink()
+        store._plans.clear()
+        requests_seen.clear()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            plans = list(pool.map(_get, range(8)))
+
+        assert all(plan.equals(plans[0]) for plan in plans)
+        assert len(requests_seen) == 1
+        assert sorted(path.suffix for path in tmp_path.iterdir()) == [".json", ".parquet"]
+
+
+def test_stale_plan_is_revalidated_with_its_etag(plan_url, tmp_path):
+    url, requests_seen = plan_url
+    now = [0.0]
+    store = TrainingPlanStore(cache_dir=str(tmp_path), ttl=60, clock=lambda: now[0])
+    first = store.get(url)
+
+    now[0] = 30
+    store.get(url)
+    assert requests_seen == [None]
+
+    now[0] = 120
+    assert TrainingPlanStore(cache_dir=str(tmp_path), ttl=60, clock=lambda: now[0]).get(url).equals(first)
+    assert requests_seen == [None, ETAG]
+
+
+def unavailable_server_handler(delay: float = 0.0, status: int = 503):
+    class _UnavailableHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    return _UnavailableHandler
+
+
+@pytest.mark.parametrize("delay, status", [(0.0, 503), (2.0, 200)], ids=["server-error", "hung"])
+def test_stale_plan_is_returned_when_revalidation_fails(plan_url, serve, tmp_path, delay, status):
+    url, _ = plan_url
+    first = TrainingPlanStore(cache_dir=str(tmp_path), clock=lambda: 0.0).get(url)
+    down_url = f"{serve(unavailable_server_handler(delay, status))}/5k-novice/"
+    # Cache the plan under the unavailable server's URL, as if it had answered before.
+    store = TrainingPlanStore(cache_dir=str(tmp_path), ttl=60, clock=lambda: 120.0, timeout=0.5)
+    for src, dst in zip(store._paths(url), store._paths(down_url)):
+        os.replace(src, dst)
+
+    started = time.monotonic()
+    assert store.get(down_url).equals(first)
+    assert time.monotonic() - started < 1.5
+
+
+def test_uncached_plan_raises_when_the_server_is_unavailable(serve, tmp_path):
+    url = f"{serve(unavailable_server_handler())}/5k-novice/"
+
+    with pytest.raises(requests.HTTPError):
+        TrainingPlanStore(cache_dir=str(tmp_path)).get(url)